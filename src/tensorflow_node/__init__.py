@@ -1,5 +1,14 @@
 # -*- coding: utf-8 -*-
 from .utils import SummaryWriter
+from .utils import BeliefRecorder
+from .utils import BeliefReader
+from .utils import SessionProfile
+from .utils import Config
+from .utils import BeliefCache
+from .utils import QueryServer
+from .utils import QueryClient
+from .utils import NoveltyGate
+from .utils import MemoryMonitor
 from .input import OpenCVInputLayer
 from .input import ROSInputLayer
 from .nodes import AutoEncoderNode
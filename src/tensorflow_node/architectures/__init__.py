@@ -1,3 +1,5 @@
 from .architecture import NetworkArchitecture
 from .destin import DestinArchitecture
 from .handcoded_destin import HandcodedDestinArchitecture
+from .sweep import HyperparameterSweep
+from .incremental import IncrementalInference
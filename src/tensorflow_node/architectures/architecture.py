@@ -13,7 +13,9 @@ class NetworkArchitecture(object):
 
     def __init__(self):
         self.train_op = tf.no_op()
+        self.level_train_ops = []
         self.nodes = []
+        self.levels = {}
         pass
 
     def str_to_class(self, str):
@@ -22,3 +24,125 @@ class NetworkArchitecture(object):
     def create_node(self, session, node_type, node_params):
         node_class = self.str_to_class(node_type)
         return node_class(session, **node_params)
+
+    def update_train_op(self):
+        # sibling nodes don't depend on each other, grouping them per level
+        # lets the scheduler run all of them in parallel within one step.
+        self.level_train_ops = []
+
+        for level in sorted(set(self.levels.get(node, 0) for node in self.nodes)):
+            train_ops = [node.train_op for node in self.nodes if self.levels.get(node, 0) == level]
+
+            self.level_train_ops.append(tf.group(*train_ops, name="train_level_%i" % level))
+
+        self.train_op = tf.group(*self.level_train_ops, name="train")
+
+    # Runtime reconfiguration
+    def add_node(self, session, node_type, node_params, input_tensors, level=0):
+        node = self.create_node(session, node_type, node_params)
+
+        for tensor in input_tensors:
+            node.register_tensor(tensor)
+
+        node.initialize_graph()
+
+        self.nodes.append(node)
+        self.levels[node] = level
+        self.update_train_op()
+
+        return node
+
+    def remove_node(self, node):
+        output_tensor = node.get_output_tensor()
+
+        self.nodes.remove(node)
+        self.levels.pop(node, None)
+        node.remove_summaries()
+
+        for receiver in self.receivers_of(output_tensor):
+            if all(t is output_tensor for t in receiver.input_tensors):
+                # nothing left to encode, the receiver is removed as well
+                self.remove_node(receiver)
+            else:
+                self.disconnect(receiver, output_tensor)
+
+        self.update_train_op()
+
+    def connect(self, node, tensor):
+        old_output = node.output_tensor
+        node.register_tensor(tensor)
+        self.propagate(node, old_output)
+        self.update_train_op()
+
+    def disconnect(self, node, tensor):
+        old_output = node.output_tensor
+        node.deregister_tensor(tensor)
+        self.propagate(node, old_output)
+        self.update_train_op()
+
+    def apply_command(self, session, inputlayer, command):
+        """
+        Applies one rewiring command given as dict, e.g. parsed from JSON:
+
+          {"op": "add", "type": "AutoEncoderNode", "params": {...}, "inputs": [...], "level": 0}
+          {"op": "remove", "node": name}
+          {"op": "connect", "node": name, "input": input}
+          {"op": "disconnect", "node": name, "input": input}
+
+        Inputs are node names for node outputs or [x, y, width, height] for
+        input layer regions. Returns the added node or the changed node.
+        """
+        op = command.get("op")
+
+        if op == "add":
+            return self.add_node(session, command["type"], command.get("params", {}),
+                                 [self.resolve_input(inputlayer, source) for source in command["inputs"]],
+                                 level=command.get("level", 0))
+
+        node = self.node_by_name(command["node"])
+
+        if op == "remove":
+            self.remove_node(node)
+        elif op == "connect":
+            self.connect(node, self.resolve_input(inputlayer, command["input"]))
+        elif op == "disconnect":
+            source = command["input"]
+            if isinstance(source, list):
+                # match regions by value instead of slicing them again
+                matches = [t for t in node.input_tensors if list(getattr(t, "region", [])) == source]
+            else:
+                output_tensor = self.node_by_name(source).get_output_tensor()
+                matches = [t for t in node.input_tensors if t is output_tensor]
+            if not matches:
+                raise ValueError("NetworkArchitecture - %s has no input %s" % (node.name, source))
+            self.disconnect(node, matches[0])
+        else:
+            raise ValueError("NetworkArchitecture - unknown command " + str(op))
+
+        return node
+
+    def node_by_name(self, name):
+        for node in self.nodes:
+            if node.name == name:
+                return node
+        raise KeyError("NetworkArchitecture - no node " + str(name))
+
+    def resolve_input(self, inputlayer, source):
+        if isinstance(source, list):
+            return inputlayer.get_tensor_for_region(source)
+        return self.node_by_name(source).get_output_tensor()
+
+    def receivers_of(self, tensor):
+        return [node for node in self.nodes if any(t is tensor for t in node.input_tensors)]
+
+    def propagate(self, node, old_output):
+        # only nodes above a rebuilt node need to be rebuilt, everything else keeps its graph
+        if old_output is None or old_output is node.output_tensor:
+            return
+
+        rospy.logdebug("rewiring receivers of " + node.name)
+
+        for receiver in self.receivers_of(old_output):
+            receiver_output = receiver.output_tensor
+            receiver.replace_tensor(old_output, node.output_tensor)
+            self.propagate(receiver, receiver_output)
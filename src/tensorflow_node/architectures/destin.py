@@ -13,24 +13,30 @@ from tensorflow_node.architectures import NetworkArchitecture
 class DestinArchitecture(NetworkArchitecture):
 
     def __init__(self, session, inputlayer, node_type, node_params, receptive_field=[14, 14], stride=[7, 7]):
+        # node names are derived from their path in the tree, so summary tags are
+        # the same after a restart. A name in node_params names the top node.
+        top_name = node_params.get("name", "destin")
+
         # TODO Assertions:
         #   - inputlayer size and receptive field / stride fit together...
         #   - ...?
 
         self.nodes = []
-        self.train_op = []
+        self.levels = {}
 
         print "creating DeSTIN network..."
 
-        def destin_node(level, number_of_layers, x_pos=0.0, y_pos=0.0):
+        def destin_node(level, number_of_layers, x_pos=0.0, y_pos=0.0, name=top_name):
             print " creating node @ level %i" % level
-            node = self.create_node(session, node_type, node_params)
+            node = self.create_node(session, node_type, dict(node_params, name=name))
 
+            # children overlap with the stride, so positions don't identify nodes. Letters
+            # keep names apart from the numbered scopes of rebuilt nodes, e.g. destin_a_1.
             if (level < number_of_layers):
-                node.register_tensor(destin_node(level + 1, number_of_layers, x_pos, y_pos))
-                node.register_tensor(destin_node(level + 1, number_of_layers, x_pos + stride[0], y_pos))
-                node.register_tensor(destin_node(level + 1, number_of_layers, x_pos, y_pos + stride[1]))
-                node.register_tensor(destin_node(level + 1, number_of_layers, x_pos + stride[0], y_pos + stride[1]))
+                node.register_tensor(destin_node(level + 1, number_of_layers, x_pos, y_pos, name + "_a"))
+                node.register_tensor(destin_node(level + 1, number_of_layers, x_pos + stride[0], y_pos, name + "_b"))
+                node.register_tensor(destin_node(level + 1, number_of_layers, x_pos, y_pos + stride[1], name + "_c"))
+                node.register_tensor(destin_node(level + 1, number_of_layers, x_pos + stride[0], y_pos + stride[1], name + "_d"))
             else:
                 region = [int(np.round(x_pos)), int(np.round(y_pos)), receptive_field[0], receptive_field[1]]
                 print "  registering region @ %i %i" % (x_pos, y_pos)
@@ -39,7 +45,7 @@ class DestinArchitecture(NetworkArchitecture):
             node.initialize_graph()
 
             self.nodes.append(node)
-            self.train_op.append(node.train_op)
+            self.levels[node] = level
 
             return node.get_output_tensor()
 
@@ -48,3 +54,9 @@ class DestinArchitecture(NetworkArchitecture):
 
         # create network
         destin_node(0, nr_of_layers)
+
+        # names key variable scopes, publishers and recordings
+        names = [node.name for node in self.nodes]
+        assert len(set(names)) == len(names), "DestinArchitecture - node names are not unique"
+
+        self.update_train_op()
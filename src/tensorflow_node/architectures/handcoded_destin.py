@@ -41,4 +41,5 @@ class HandcodedDestinArchitecture(NetworkArchitecture):
         ae_top.initialize_graph()
 
         self.nodes = [ae_bottom_a, ae_bottom_b, ae_bottom_c, ae_bottom_d, ae_top]
-        self.train_op = [ae_bottom_a.train_op, ae_bottom_b.train_op, ae_bottom_c.train_op, ae_bottom_d.train_op, ae_top.train_op]
+        self.levels = {ae_bottom_a: 1, ae_bottom_b: 1, ae_bottom_c: 1, ae_bottom_d: 1, ae_top: 0}
+        self.update_train_op()
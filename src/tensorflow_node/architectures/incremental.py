@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import rospy
+
+
+class IncrementalInference(object):
+    """
+    Evaluates node states, recomputing only subtrees whose input changed.
+
+    For every node the input regions it was last computed on are kept. A node
+    is recomputed if the mean absolute difference of any of its regions, for
+    any sample of the batch, exceeds threshold, or if one of its children is
+    recomputed. Cached states of the unchanged children are fed into the
+    graph instead, so TF prunes their subgraphs. Cached states are only valid
+    for fixed weights: call invalidate() after training and analyze() after
+    rewiring the architecture.
+    """
+
+    def __init__(self, session, architecture, inputlayer, threshold=0.01):
+        self.session = session
+        self.architecture = architecture
+        self.inputlayer = inputlayer
+        self.threshold = threshold
+
+        self.recomputed = 0
+        self.analyze()
+
+    def analyze(self):
+        nodes = self.architecture.nodes
+        producers = dict((id(node.get_output_tensor()), node) for node in nodes)
+
+        # for each node its inputs as (tensor, child node or None for input regions)
+        self.inputs = {}
+        for node in nodes:
+            self.inputs[node] = [(tensor, producers.get(id(tensor))) for tensor in node.input_tensors]
+
+        children = set(child for node in nodes for _, child in self.inputs[node] if child is not None)
+        self.roots = [node for node in nodes if node not in children]
+
+        self.invalidate()
+
+    def invalidate(self):
+        self.cached_regions = {}
+        self.cached_states = {}
+
+    def changed(self, node, frames, dirty):
+        changed = node not in self.cached_states
+
+        for i, (tensor, child) in enumerate(self.inputs[node]):
+            if child is not None:
+                changed = self.changed(child, frames, dirty) or changed
+                continue
+
+            region = tensor.region
+            cropped = frames[:, region[0]:region[0] + region[2], region[1]:region[1] + region[3], :]
+            cached = self.cached_regions.get((node, i))
+
+            if cached is None or np.abs(cropped - cached).reshape(len(cropped), -1).mean(axis=1).max() > self.threshold:
+                changed = True
+
+        dirty[node] = changed
+        return changed
+
+    def run(self, feed_dict):
+        """Returns a dict of node states for the batch in feed_dict."""
+        frames = np.array(feed_dict[self.inputlayer.name + '/input:0'], dtype=np.float32)
+
+        if self.inputlayer.dtype == "uint8":
+            frames *= 1.0 / 255
+
+        dirty = {}
+        for root in self.roots:
+            self.changed(root, frames, dirty)
+
+        recompute = [node for node in self.architecture.nodes if dirty[node]]
+
+        if recompute:
+            feed_dict = dict(feed_dict)
+
+            # unchanged children are fed from cache, so their subgraphs are skipped
+            for node in recompute:
+                for _, child in self.inputs[node]:
+                    if child is not None and not dirty[child]:
+                        feed_dict[child.get_inference_tensor()] = self.cached_states[child]
+
+            states = self.session.run([node.get_inference_tensor() for node in recompute], feed_dict=feed_dict)
+
+            for node, state in zip(recompute, states):
+                self.cached_states[node] = state
+
+                for i, (tensor, child) in enumerate(self.inputs[node]):
+                    if child is None:
+                        region = tensor.region
+                        self.cached_regions[(node, i)] = frames[:, region[0]:region[0] + region[2], region[1]:region[1] + region[3], :]
+
+        self.recomputed = len(recompute)
+        rospy.logdebug("recomputed %i of %i nodes" % (self.recomputed, len(self.architecture.nodes)))
+
+        return dict((node, self.cached_states[node]) for node in self.architecture.nodes)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import hashlib
+import itertools
+import multiprocessing
+import numpy as np
+import rospy
+import tensorflow as tf
+
+from tensorflow_node.input import OpenCVInputLayer
+from tensorflow_node.utils import SessionProfile
+
+
+class HyperparameterSweep(object):
+    """
+    Grid or random search over architecture and node parameters.
+
+    config is the tensorflow_node section of a daemon config. space maps
+    parameter paths below architecture/params (e.g. 'node_params/hidden_dim'
+    or 'receptive_field') to a list of choices, or for random search also to
+    a {min, max, log} range. Every trial runs in its own process with its own
+    graph and session on frames that are preprocessed once and shared through
+    a memory-mapped cache file.
+    """
+
+    def __init__(self, config, space, mode="grid", trials=10, steps=500, processes=None,
+                 convergence_tolerance=0.01, cache_folder="/tmp/tensorflow_node_sweep", seed=None):
+        if mode not in ["grid", "random"]:
+            raise ValueError("HyperparameterSweep - unknown mode " + str(mode))
+
+        self.config = config
+        self.space = space
+        self.mode = mode
+        self.trials = trials
+        self.steps = steps
+        self.processes = processes
+        self.convergence_tolerance = convergence_tolerance
+        self.cache_folder = cache_folder
+        self.random = np.random.RandomState(seed)
+
+    def expand(self):
+        """Returns a list of parameter assignments, one per trial."""
+        paths = sorted(self.space.keys())
+
+        if self.mode == "grid":
+            for path in paths:
+                if not isinstance(self.space[path], list):
+                    raise ValueError("HyperparameterSweep - grid search needs a list of choices for " + path)
+
+            return [dict(zip(paths, values)) for values in itertools.product(*[self.space[path] for path in paths])]
+
+        return [dict((path, self.sample(self.space[path])) for path in paths) for _ in xrange(self.trials)]
+
+    def sample(self, choices):
+        if isinstance(choices, list):
+            return choices[self.random.randint(len(choices))]
+
+        low, high = choices["min"], choices["max"]
+
+        if choices.get("log", False):
+            value = np.exp(self.random.uniform(np.log(low), np.log(high)))
+        else:
+            value = self.random.uniform(low, high)
+
+        if isinstance(low, int) and isinstance(high, int):
+            return int(np.round(value))
+
+        return float(value)
+
+    def prepare_input(self):
+        """Preprocesses the input video once and caches it as .npy file."""
+        params = dict(self.config["inputlayer"]["params"])
+        key = repr(sorted(params.items()))
+        filename = os.path.join(self.cache_folder, "frames_%s.npy" % hashlib.md5(key.encode("utf-8")).hexdigest())
+
+        if os.path.isfile(filename):
+            return filename
+
+        if not os.path.exists(self.cache_folder):
+            os.makedirs(self.cache_folder)
+
+        # input layer only used for reading, keep its placeholder out of the default graph
+        with tf.Graph().as_default():
+            inputlayer = OpenCVInputLayer(**params)
+            frames = np.array(list(inputlayer.read_frames(params.get("number_of_frames", -1))))
+
+        if len(frames) < inputlayer.batch_size:
+            raise ValueError("HyperparameterSweep - input has less frames than one batch")
+
+        np.save(filename, frames)
+        rospy.loginfo("cached %i preprocessed frames in %s" % (len(frames), filename))
+
+        return filename
+
+    def run(self):
+        frames_file = self.prepare_input()
+        assignments = self.expand()
+
+        jobs = [(self.config, assignment, frames_file, self.steps, self.convergence_tolerance)
+                for assignment in assignments]
+
+        rospy.loginfo("running %i trials" % len(jobs))
+
+        # fresh process per trial, TF state is not shared between trials
+        pool = multiprocessing.Pool(self.processes, maxtasksperchild=1)
+        try:
+            results = pool.map(run_trial, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+        return sorted(results, key=lambda result: result["loss"])
+
+    @staticmethod
+    def table(results):
+        paths = sorted(results[0]["params"].keys()) if results else []
+        columns = paths + ["loss", "converged_after_s", "frames_per_s"]
+
+        rows = [[str(result["params"][path]) for path in paths] +
+                ["%.6f" % result["loss"], "%.2f" % result["time_to_converge"], "%.0f" % result["throughput"]]
+                for result in results]
+
+        widths = [max([len(column)] + [len(row[i]) for row in rows]) for i, column in enumerate(columns)]
+        lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+        lines += ["  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in rows]
+
+        return "\n".join(lines)
+
+
+def apply_assignment(params, assignment):
+    # returns a copy of the architecture params with the paths of assignment set
+    params = dict(params)
+
+    for path, value in assignment.items():
+        keys = path.split("/")
+        target = params
+
+        for key in keys[:-1]:
+            target[key] = dict(target.get(key, {}))
+            target = target[key]
+
+        target[keys[-1]] = value
+
+    return params
+
+
+def run_trial(job):
+    config, assignment, frames_file, steps, convergence_tolerance = job
+
+    frames = np.load(frames_file, mmap_mode="r")
+
+    inputlayer_params = dict(config["inputlayer"]["params"])
+    architecture_params = apply_assignment(config["architecture"]["params"], assignment)
+
+    # trials run side by side, by default each one gets a single thread
+    profile = SessionProfile(**config.get("sweep", {}).get("session", {"intra_op_threads": 1, "inter_op_threads": 1}))
+
+    with tf.Graph().as_default() as graph, profile.create_session(graph) as sess:
+        inputlayer = OpenCVInputLayer(**inputlayer_params)
+        architecture_class = getattr(sys.modules["tensorflow_node.architectures"], config["architecture"]["type"])
+        architecture = architecture_class(sess, inputlayer, **architecture_params)
+
+        # the training loss compares against noisy input, it only tracks convergence
+        loss = tf.add_n([node.loss_tensor for node in architecture.nodes]) / len(architecture.nodes)
+
+        # trials are ranked on the clean reconstruction loss of the inference path
+        for node in architecture.nodes:
+            node.get_inference_tensor()
+        inference_loss = tf.add_n([node.inference_loss for node in architecture.nodes]) / len(architecture.nodes)
+
+        batch_size = inputlayer.batch_size
+        number_of_batches = len(frames) // batch_size
+        losses = []
+        times = []
+
+        start = time.time()
+
+        for step in xrange(steps):
+            offset = (step % number_of_batches) * batch_size
+            feed_dict = {inputlayer.name + "/input:0": frames[offset:offset + batch_size]}
+
+            _, step_loss = sess.run([architecture.train_op, loss], feed_dict=feed_dict)
+
+            losses.append(step_loss)
+            times.append(time.time() - start)
+
+        duration = time.time() - start
+
+        for node in architecture.nodes:
+            node.sync_inference_weights()
+
+        # final loss over all cached batches, without noise so noise settings compare fairly
+        final_loss = np.mean([sess.run(inference_loss, feed_dict={inputlayer.name + "/input:0": frames[i * batch_size:(i + 1) * batch_size]})
+                              for i in xrange(number_of_batches)])
+
+    # converged once the loss stays within tolerance of the final training loss
+    losses = np.array(losses)
+    window = losses[-max(steps // 20, 1):].mean()
+    outside = np.nonzero(np.abs(losses - window) > convergence_tolerance * abs(window))[0]
+    converged_step = outside[-1] + 1 if len(outside) > 0 else 0
+    time_to_converge = times[min(converged_step, steps - 1)]
+
+    return {"params": assignment,
+            "loss": float(final_loss),
+            "time_to_converge": time_to_converge,
+            "throughput": steps * batch_size / duration}
@@ -11,16 +11,27 @@ import tensorflow as tf
 class InputLayer(object):
     __metaclass__ = abc.ABCMeta
 
-    def __init__(self, batch_size=1, output_size=[28, 28], input=""):
+    def __init__(self, batch_size=1, output_size=[28, 28], input="", dtype="float32"):
         self.name = 'inputlayer-%08x' % random.getrandbits(32)
         self.output_size = output_size
         self.input = input
         self.batch_size = batch_size
         self.batch = []
+        self.dtype = dtype
 
         with tf.name_scope(self.name) as n_scope:
             self.name_scope = n_scope
-            self.input_placeholder = tf.placeholder(dtype=tf.float32, shape=(self.batch_size, output_size[0], output_size[1], 1), name='input')
+            shape = (self.batch_size, output_size[0], output_size[1], 1)
+
+            if self.dtype == "uint8":
+                # frames are fed as raw bytes and normalized in-graph
+                self.input_placeholder = tf.placeholder(dtype=tf.uint8, shape=shape, name='input')
+                self.input_tensor = tf.cast(self.input_placeholder, tf.float32) * (1.0 / 255)
+            elif self.dtype == "float32":
+                self.input_placeholder = tf.placeholder(dtype=tf.float32, shape=shape, name='input')
+                self.input_tensor = self.input_placeholder
+            else:
+                raise ValueError("InputLayer - unsupported dtype " + str(dtype))
 
         rospy.logdebug("📸 Input Layer initalized")
 
@@ -31,10 +42,11 @@ class InputLayer(object):
     def get_tensor_for_region(self, region):
         with tf.name_scope(self.name_scope):
             # this is a possible performance hog
-            cropped = tf.slice(self.input_placeholder, [0, region[0], region[1], 0], [-1, region[2], region[3], -1])
+            cropped = tf.slice(self.input_tensor, [0, region[0], region[1], 0], [-1, region[2], region[3], -1])
             flattened = tf.reshape(cropped, [self.batch_size, -1])
 
         flattened.sender = self
+        flattened.region = region
         return flattened
 
     # TODO: is this needed anymore?
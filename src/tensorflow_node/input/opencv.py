@@ -14,16 +14,13 @@ class OpenCVInputLayer(InputLayer):
     Contains OpenCV to feed in video feeds to TF.
     """
 
-    def __init__(self, batch_size=1, output_size=[28, 28], input="", number_of_frames=-1, repeat=True):
-        super(OpenCVInputLayer, self).__init__(batch_size, output_size, input)
+    def __init__(self, batch_size=1, output_size=[28, 28], input="", number_of_frames=-1, repeat=True, dtype="float32"):
+        super(OpenCVInputLayer, self).__init__(batch_size, output_size, input, dtype)
         self.number_of_frames = number_of_frames
         self.repeat = repeat
 
-    def feed_to(self, feed_callback):
-
-        # TODO: there should be clearer distinction here, get these params via daemon.
-        frames = rospy.get_param("tensorflow_node/inputlayer/params/number_of_frames")
-        repeat = rospy.get_param("tensorflow_node/inputlayer/params/repeat")
+    def read_frames(self, frames=-1):
+        """Yields preprocessed frames of the video, all of them if frames is negative."""
 
         # check if file exists
         if not os.path.isfile(self.input) or self.input == 0:
@@ -39,25 +36,35 @@ class OpenCVInputLayer(InputLayer):
 
             res = cv2.resize(frame, (self.output_size[0], self.output_size[1]), interpolation=cv2.INTER_CUBIC)
             gray = cv2.cvtColor(res, cv2.COLOR_BGR2GRAY)
-            gray = gray * 1.0 / 255
-
-            # use grayscale image
-            self.batch.append(gray.reshape([self.output_size[0], self.output_size[1], 1]))
 
-            # batch is full
+            # uint8 frames are normalized in-graph
+            if self.dtype == "float32":
+                gray = gray * 1.0 / 255
 
-            # Can we use TF Queue for this?
-
-            if len(self.batch) >= self.batch_size:
-                feed_dict = {self.name + '/input:0': np.array(self.batch)}
-                feed_callback(feed_dict)
-                self.batch = []
-                print("Inputlayer: Evaluated batch of size %i" % self.batch_size)
+            # use grayscale image
+            yield gray.reshape([self.output_size[0], self.output_size[1], 1])
 
             if (frames > 0):
                 frames -= 1
 
         cap.release()
 
-        if (repeat):
-            self.feed_to(feed_callback)
+    def feed_to(self, feed_callback):
+
+        while True:
+            for frame in self.read_frames(self.number_of_frames):
+                self.batch.append(frame)
+
+                # batch is full
+
+                # Can we use TF Queue for this?
+
+                if len(self.batch) >= self.batch_size:
+                    feed_dict = {self.name + '/input:0': np.array(self.batch)}
+                    feed_callback(feed_dict)
+                    self.batch = []
+                    print("Inputlayer: Evaluated batch of size %i" % self.batch_size)
+
+            # start over instead of recursing, so long runs don't grow the stack
+            if (not self.repeat):
+                break
@@ -26,7 +26,12 @@ class ROSInputLayer(InputLayer):
             gray = (channels[0] + channels[1] + channels[2]) / 3  # could to different weights per channel here
 
             # Resize to normalized input layer size
-            resized = transform.resize(gray, [self.output_size[0], self.output_size[1]]).reshape([self.output_size[0], self.output_size[1], 1])
+            if self.dtype == "uint8":
+                # uint8 frames are normalized in-graph
+                resized = transform.resize(gray, [self.output_size[0], self.output_size[1]], preserve_range=True).astype(np.uint8)
+            else:
+                resized = transform.resize(gray, [self.output_size[0], self.output_size[1]])
+            resized = resized.reshape([self.output_size[0], self.output_size[1], 1])
 
             # Append to processing batch
             self.batch.append(resized)
@@ -46,4 +51,5 @@ class ROSInputLayer(InputLayer):
         # ROS subscribe...
         rospy.logwarn("Subscribing to topic " + self.input)
         topic_name = self.input
-        rospy.Subscriber(topic_name, Image, callback)
+        # frames arriving while a batch is evaluated are dropped beyond one batch
+        rospy.Subscriber(topic_name, Image, callback, queue_size=self.batch_size)
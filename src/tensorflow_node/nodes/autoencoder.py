@@ -27,7 +27,8 @@ class AutoEncoderNode(object):
                  noise_type="normal",
                  noise_amount=0.2,
                  loss="rmse",
-                 lr=0.007):
+                 lr=0.007,
+                 precision="float32"):
 
         self.name = name
 
@@ -41,6 +42,17 @@ class AutoEncoderNode(object):
         # these are initialized upon first call to output_tensor
         self.output_tensor = None
         self.train_op = None
+        self.loss_tensor = None
+        self.sample_weights = None
+        self.summaries = []
+        # these are initialized upon first call to inference_tensor
+        self.inference_tensor = None
+        self.inference_loss = None
+        self.inference_sample_loss = None
+        self.inference_sync_op = None
+
+        # incremented each time the graph is rebuilt for new inputs
+        self.generation = 0
 
         # set parameters (Move those to init function params?)
         self.iteration = 0
@@ -51,6 +63,10 @@ class AutoEncoderNode(object):
         self.noise_amount = noise_amount
         self.loss = loss
         self.lr = lr
+        self.precision = precision
+
+        if self.precision not in ["float32", "float16"]:
+            raise ValueError("AutoEncoderNode - unsupported precision " + str(precision))
 
         # generate reusable scope
         with tf.name_scope(self.name) as scope:
@@ -64,19 +80,40 @@ class AutoEncoderNode(object):
 
         return self.output_tensor
 
+    def get_inference_tensor(self):
+        if self.inference_tensor is None:
+            self.inference_tensor, self.inference_loss, self.inference_sample_loss, self.inference_sync_op = self.build_inference_graph(self.precision)
+            self.session.run(self.inference_sync_op)
+
+        return self.inference_tensor
+
+    def get_sample_loss_tensor(self):
+        # reconstruction error per sample on the inference path
+        self.get_inference_tensor()
+        return self.inference_sample_loss
+
     def initialize_graph(self):
         rospy.logdebug(self.name + " initializing output tensor...")
 
         # store all variables, so that we can later determinate what new variables there are
         temp = set(tf.all_variables())
 
+        # variables of a rebuilt graph can't reuse the names of the previous one
+        variable_scope = self.name
+        if self.generation > 0:
+            variable_scope = "%s_%i" % (self.name, self.generation)
+
         # get absolute scope
         with tf.name_scope(self.scope):
-            with tf.variable_scope(self.name):
+            with tf.variable_scope(variable_scope):
                 # concatenate input tensors
                 input_concat = tf.concat(1, self.input_tensors)
                 input_dim = input_concat.get_shape()[1]
 
+                # weights of the samples in the loss, all samples count equally by default
+                batch_shape = input_concat.get_shape()[0:1]
+                sample_weights = tf.placeholder_with_default(tf.ones(batch_shape), batch_shape, name="sample_weights")
+
                 # deep copy to prevent losses from affecting bottom layers.
                 x = tf.get_variable("input_copy", input_concat.get_shape())
                 x_ = self.add_noise(x, self.noise_type, self.noise_amount)
@@ -103,21 +140,18 @@ class AutoEncoderNode(object):
                     decoded = self.activate(tf.matmul(encoded, decode_weights) + decode_biases, self.activation, name="decoded")
 
                 with tf.name_scope("loss"):
-                    # reconstruction loss
-                    if self.loss == 'rmse':
-                        loss = tf.sqrt(tf.reduce_mean(tf.square(tf.sub(x_, decoded))))
-                    elif self.loss == 'cross-entropy':
-                        # loss = tf.reduce_mean(tf.nn.softmax_cross_entropy_with_logits(decoded, x_))  ### TODO this is not working in it's current form! why?
-                        loss = -tf.reduce_mean(x_ * tf.log(decoded))
+                    loss = self.reconstruction_loss(x_, decoded, sample_weights)
 
                 with tf.name_scope("train"):
                     train_op = tf.train.AdamOptimizer(self.lr).minimize(loss)
 
-                tf.scalar_summary(self.name + "_loss", loss)
-                tf.histogram_summary(self.name + "_encode_weights", encode_weights)
-                tf.histogram_summary(self.name + "_encode_biases", encode_biases)
-                tf.histogram_summary(self.name + "_decode_weights", decode_weights)
-                tf.histogram_summary(self.name + "_decode_biases", decode_biases)
+                self.summaries = [
+                    tf.scalar_summary(self.name + "_loss", loss),
+                    tf.histogram_summary(self.name + "_encode_weights", encode_weights),
+                    tf.histogram_summary(self.name + "_encode_biases", encode_biases),
+                    tf.histogram_summary(self.name + "_decode_weights", decode_weights),
+                    tf.histogram_summary(self.name + "_decode_biases", decode_biases)
+                ]
 
             # initalize all new variables
             self.session.run(tf.initialize_variables(set(tf.all_variables()) - temp))
@@ -128,9 +162,163 @@ class AutoEncoderNode(object):
 
             self.train_op = train_op
             self.output_tensor = encoded
+            self.loss_tensor = loss
+            self.sample_weights = sample_weights
+
+            self.encode_weights = encode_weights
+            self.encode_biases = encode_biases
+            self.decode_biases = decode_biases
+            self.variable_scope = variable_scope
 
         return
 
+    def build_inference_graph(self, precision):
+        """
+        Builds a forward-only path from the input tensors for a given precision.
+
+        float16 keeps a half precision copy of the weights and runs the matmuls
+        in half precision. Returns the encoded tensor, the
+        reconstruction loss, the reconstruction loss per sample and the op that
+        copies trained weights to storage.
+        """
+        self.get_output_tensor()
+
+        temp = set(tf.all_variables())
+
+        with tf.name_scope(self.scope):
+            with tf.name_scope("inference_" + precision):
+                # no input copy needed, gradients are never computed here
+                x = tf.concat(1, [self.inference_input(tensor) for tensor in self.input_tensors])
+                layer = self.inference_weights(precision, "", self.encode_weights, self.encode_biases, self.decode_biases)
+                encoded, loss, sample_loss, sync_op = self.inference_layers(x, [layer], [self.activation])
+
+        self.session.run(tf.initialize_variables(set(tf.all_variables()) - temp))
+
+        encoded.sender = self
+
+        return encoded, loss, sample_loss, sync_op
+
+    def inference_weights(self, precision, suffix, trained_encode_weights, trained_encode_biases, trained_decode_biases):
+        # returns encode weights, encode biases, decode biases and sync op of one layer
+        input_dim, hidden_dim = trained_encode_weights.get_shape()
+
+        if precision == "float32":
+            return trained_encode_weights, trained_encode_biases, trained_decode_biases, tf.no_op()
+
+        elif precision == "float16":
+            with tf.variable_scope(self.variable_scope):
+                encode_weights = tf.get_variable("encode_weights_float16" + suffix, (input_dim, hidden_dim), dtype=tf.float16, initializer=tf.zeros_initializer, trainable=False)
+                encode_biases = tf.get_variable("encode_biases_float16" + suffix, (hidden_dim), dtype=tf.float16, initializer=tf.zeros_initializer, trainable=False)
+                decode_biases = tf.get_variable("decode_biases_float16" + suffix, (input_dim), dtype=tf.float16, initializer=tf.zeros_initializer, trainable=False)
+
+            sync_op = tf.group(encode_weights.assign(tf.cast(trained_encode_weights, tf.float16)),
+                               encode_biases.assign(tf.cast(trained_encode_biases, tf.float16)),
+                               decode_biases.assign(tf.cast(trained_decode_biases, tf.float16)))
+
+            return encode_weights, encode_biases, decode_biases, sync_op
+
+    def inference_layers(self, x, layers, activations):
+        # encodes x through all layers and decodes back for the reconstruction loss
+        h = tf.cast(x, layers[0][0].dtype.base_dtype)
+
+        with tf.name_scope("encoded"):
+            for (encode_weights, encode_biases, _, _), activation in zip(layers, activations):
+                h = self.activate(tf.matmul(h, encode_weights) + encode_biases, activation)
+
+        encoded = h
+
+        with tf.name_scope("decoded"):
+            for (encode_weights, _, decode_biases, _), activation in reversed(list(zip(layers, activations))):
+                h = self.activate(tf.matmul(h, tf.transpose(encode_weights)) + decode_biases, activation)
+
+        with tf.name_scope("loss"):
+            squared_error = tf.reduce_mean(tf.square(tf.cast(x, tf.float32) - tf.cast(h, tf.float32)), 1)
+            sample_loss = tf.sqrt(squared_error, name="sample_loss")
+            loss = tf.sqrt(tf.reduce_mean(squared_error))
+
+        sync_op = tf.group(*[layer[3] for layer in layers])
+
+        return tf.cast(encoded, tf.float32, name="encoded"), loss, sample_loss, sync_op
+
+    def inference_input(self, tensor):
+        # chain inference paths of sending nodes, input layer regions are used as they are
+        sender = getattr(tensor, "sender", None)
+
+        if sender is not None and sender is not self and hasattr(sender, "get_inference_tensor"):
+            return sender.get_inference_tensor()
+
+        return tensor
+
+    def sync_inference_weights(self):
+        # copy trained float32 weights to the reduced precision storage
+        if self.inference_tensor is not None and self.precision != "float32":
+            self.session.run(self.inference_sync_op)
+
+    def rebuild_graph(self, previous_tensors, carried_tensors):
+        """
+        Rebuilds the graph after input_tensors changed on an initialized node.
+
+        carried_tensors is aligned with the new input_tensors and holds for each
+        of them the tensor of previous_tensors whose weight rows are carried over,
+        or None for new inputs that keep their fresh initialization.
+        """
+        rospy.logdebug(self.name + " rebuilding graph for new inputs...")
+
+        old_encode_weights, old_encode_biases, old_decode_biases = self.session.run(
+            [self.encode_weights, self.encode_biases, self.decode_biases])
+
+        # rows of the weight matrix belonging to each previous input
+        old_rows = []
+        offset = 0
+        for tensor in previous_tensors:
+            ndims = tensor.get_shape()[1].value
+            old_rows.append((tensor, offset, ndims))
+            offset += ndims
+
+        self.remove_summaries()
+
+        self.output_tensor = None
+        self.train_op = None
+        self.inference_tensor = None
+        self.inference_loss = None
+        self.inference_sample_loss = None
+        self.inference_sync_op = None
+        self.generation += 1
+        self.initialize_graph()
+
+        encode_weights, decode_biases = self.session.run([self.encode_weights, self.decode_biases])
+
+        offset = 0
+        for tensor, carried in zip(self.input_tensors, carried_tensors):
+            ndims = tensor.get_shape()[1].value
+
+            for old_tensor, old_offset, old_ndims in old_rows:
+                if old_tensor is carried and old_ndims == ndims:
+                    encode_weights[offset:offset + ndims] = old_encode_weights[old_offset:old_offset + ndims]
+                    decode_biases[offset:offset + ndims] = old_decode_biases[old_offset:old_offset + ndims]
+
+            offset += ndims
+
+        self.session.run([self.encode_weights.assign(encode_weights),
+                          self.encode_biases.assign(old_encode_biases),
+                          self.decode_biases.assign(decode_biases)])
+
+        return
+
+    # reconstruction loss, weighted mean over the samples of the batch
+    def reconstruction_loss(self, x_, decoded, sample_weights):
+        if self.loss == 'rmse':
+            sample_loss = tf.reduce_mean(tf.square(tf.sub(x_, decoded)), 1)
+        elif self.loss == 'cross-entropy':
+            # loss = tf.reduce_mean(tf.nn.softmax_cross_entropy_with_logits(decoded, x_))  ### TODO this is not working in it's current form! why?
+            sample_loss = -tf.reduce_mean(x_ * tf.log(decoded), 1)
+
+        loss = tf.reduce_sum(sample_weights * sample_loss) / tf.maximum(tf.reduce_sum(sample_weights), 1e-8)
+
+        if self.loss == 'rmse':
+            return tf.sqrt(loss)
+        return loss
+
     # noise for denoising AE.
     def add_noise(self, x, noise_type, noise_amount=0.5):
         # TODO add tensorflow noise with
@@ -221,14 +409,45 @@ class AutoEncoderNode(object):
 
     # I/O
     def register_tensor(self, new_tensor):
-        # TODO: check if graph is initialized and modify for new input_dim
+        previous_tensors = list(self.input_tensors)
         self.input_tensors.append(new_tensor)
+
+        if self.output_tensor is not None:
+            self.rebuild_graph(previous_tensors, previous_tensors + [None])
         return
 
     def deregister_tensor(self, tensor):
-        # TODO: check if graph is initialized and modify for new input_dim
+        previous_tensors = list(self.input_tensors)
+        remaining_tensors = [t for t in previous_tensors if t is not tensor]
+
+        # an initialized node can't be rebuilt without any input
+        if self.output_tensor is not None and not remaining_tensors:
+            raise ValueError("AutoEncoderNode - can't remove the only input of " + self.name)
+
+        self.input_tensors = remaining_tensors
+
+        if self.output_tensor is not None:
+            self.rebuild_graph(previous_tensors, self.input_tensors)
         return
 
+    def replace_tensor(self, old_tensor, new_tensor):
+        # swap an input in place, e.g. when the sending node was rebuilt
+        previous_tensors = list(self.input_tensors)
+        self.input_tensors = [new_tensor if t is old_tensor else t for t in previous_tensors]
+
+        if self.output_tensor is not None:
+            self.rebuild_graph(previous_tensors, previous_tensors)
+        return
+
+    def remove_summaries(self):
+        # stale summaries, otherwise merging them fails on duplicate tags
+        summaries = tf.get_collection_ref(tf.GraphKeys.SUMMARIES)
+        for summary in self.summaries:
+            if summary in summaries:
+                summaries.remove(summary)
+
+        self.summaries = []
+
     # Persistence
     def load(self, filename):
         """Retrieve model from disk."""
@@ -27,6 +27,14 @@ class BaseNode(object):
         self.input_tensors.append(new_tensor)
         return
 
+    def deregister_tensor(self, tensor):
+        self.input_tensors = [t for t in self.input_tensors if t is not tensor]
+        return
+
+    def replace_tensor(self, old_tensor, new_tensor):
+        self.input_tensors = [new_tensor if t is old_tensor else t for t in self.input_tensors]
+        return
+
     # Persistence
     @abc.abstractmethod
     def load(self, filename):
@@ -1,14 +1,24 @@
 # -*- coding: utf-8 -*-
 
-import abc
 import random
 import tensorflow as tf
+import rospy
 
 from .autoencoder import AutoEncoderNode
 
 
-class StackedAutoEncoderNode(object):
-    __metaclass__ = abc.ABCMeta
+class StackedAutoEncoderNode(AutoEncoderNode):
+    """
+    Stack of tied-weight autoencoder layers built as one subgraph.
+
+    All layers share one input copy and one optimizer per phase. In the
+    'pretrain' phase every layer reconstructs its own input and gradients
+    stop at layer boundaries, so one update trains all layers greedily. In
+    the 'finetune' phase the whole stack is trained end to end on the
+    reconstruction of the node input.
+    """
+
+    PHASES = ["pretrain", "finetune"]
 
     # Initialization
     def __init__(self,
@@ -19,79 +29,168 @@ class StackedAutoEncoderNode(object):
                  noise_type="normal",
                  noise_amount=0.2,
                  loss="rmse",
-                 lr=0.007):
+                 lr=0.007,
+                 precision="float32",
+                 phase="pretrain"):
+
+        # if no name is given, randomize
+        if name == "sae":
+            name = 'sae_%08x' % random.getrandbits(32)
+
+        super(StackedAutoEncoderNode, self).__init__(session,
+                                                     name=name,
+                                                     hidden_dim=hidden_dims[-1],
+                                                     activation=activations[-1],
+                                                     noise_type=noise_type,
+                                                     noise_amount=noise_amount,
+                                                     loss=loss,
+                                                     lr=lr,
+                                                     precision=precision)
+
+        if phase not in self.PHASES:
+            raise ValueError("StackedAutoEncoderNode - unknown phase " + str(phase))
 
-        self.name = name + '_%08x' % random.getrandbits(32)
-        self.session = session
+        self.hidden_dims = hidden_dims
+        self.activations = activations
+        self.phase = phase
 
-        # this list is populated with register tensor function
-        self.input_tensors = []
         # these are initialized upon first call to output_tensor
-        self.output_tensor = None
-        self.train_op = None
+        self.layers = []
+        self.layer_losses = []
+        self.pretrain_op = None
+        self.finetune_op = None
 
-        # set parameters (Move those to init function params?)
-        self.iteration = 0
-        self.input_dim = -1
-        self.hidden_dims = hidden_dims
-        self.activations = activations
-        self.noise_type = noise_type
-        self.noise_amount = noise_amount
-        self.loss = loss
-        self.lr = lr
-
-        self.autoencoders = []
-
-        for hidden_dim, activation in zip(self.hidden_dims, self.activations):
-            ae = AutoEncoderNode(
-                session=self.session,
-                name="ae",
-                hidden_dim=hidden_dim,
-                activation=activation,
-                noise_type=self.noise_type,
-                noise_amount=self.noise_amount,
-                loss=self.loss,
-                lr=self.lr
-            )
-
-            self.autoencoders.append(ae)
+        return
+
+    def initialize_graph(self):
+        rospy.logdebug(self.name + " initializing stacked output tensor...")
+
+        # store all variables, so that we can later determinate what new variables there are
+        temp = set(tf.all_variables())
+
+        # variables of a rebuilt graph can't reuse the names of the previous one
+        variable_scope = self.name
+        if self.generation > 0:
+            variable_scope = "%s_%i" % (self.name, self.generation)
+
+        # get absolute scope
+        with tf.name_scope(self.scope):
+            with tf.variable_scope(variable_scope):
+                # concatenate input tensors
+                input_concat = tf.concat(1, self.input_tensors)
+                input_dim = input_concat.get_shape()[1]
+
+                # weights of the samples in all losses
+                batch_shape = input_concat.get_shape()[0:1]
+                sample_weights = tf.placeholder_with_default(tf.ones(batch_shape), batch_shape, name="sample_weights")
+
+                # one deep copy for the whole stack
+                x = tf.get_variable("input_copy", input_concat.get_shape())
+                assign = x.assign(input_concat)
+
+                self.layers = []
+                for i, hidden_dim in enumerate(self.hidden_dims):
+                    encode_weights = tf.get_variable("encode_weights_%i" % i, (input_dim, hidden_dim), initializer=tf.random_normal_initializer())
+                    encode_biases = tf.get_variable("encode_biases_%i" % i, (hidden_dim), initializer=tf.random_normal_initializer())
+                    decode_biases = tf.get_variable("decode_biases_%i" % i, (input_dim), initializer=tf.random_normal_initializer())
+                    self.layers.append((encode_weights, encode_biases, decode_biases))
+                    input_dim = hidden_dim
+
+            # ensure deep copy for these operations
+            with self.session.graph.control_dependencies([assign]):
+                # pretraining: each layer reconstructs its own input
+                self.layer_losses = []
+                layer_input = x
+
+                for i, ((encode_weights, encode_biases, decode_biases), activation) in enumerate(zip(self.layers, self.activations)):
+                    with tf.name_scope("layer_%i" % i):
+                        encoded = self.activate(tf.matmul(layer_input, encode_weights) + encode_biases, activation, name="encoded")
+                        decoded = self.activate(tf.matmul(encoded, tf.transpose(encode_weights)) + decode_biases, activation, name="decoded")
+
+                        with tf.name_scope("loss"):
+                            layer_loss = self.reconstruction_loss(self.add_noise(layer_input, self.noise_type, self.noise_amount), decoded, sample_weights)
+                            self.layer_losses.append(layer_loss)
+
+                    # upper layers don't train the lower ones while pretraining
+                    layer_input = tf.stop_gradient(encoded)
+
+                # fine-tuning: reconstruct the node input through the whole stack
+                with tf.name_scope("finetune"):
+                    h = x
+                    for (encode_weights, encode_biases, _), activation in zip(self.layers, self.activations):
+                        h = self.activate(tf.matmul(h, encode_weights) + encode_biases, activation)
+
+                    for (encode_weights, _, decode_biases), activation in reversed(list(zip(self.layers, self.activations))):
+                        h = self.activate(tf.matmul(h, tf.transpose(encode_weights)) + decode_biases, activation)
+
+                    with tf.name_scope("loss"):
+                        loss = self.reconstruction_loss(self.add_noise(x, self.noise_type, self.noise_amount), h, sample_weights)
+
+                with tf.name_scope("train"):
+                    pretrain_op = tf.train.AdamOptimizer(self.lr).minimize(tf.add_n(self.layer_losses), name="pretrain")
+                    finetune_op = tf.train.AdamOptimizer(self.lr).minimize(loss, name="finetune")
+
+                self.summaries = [tf.scalar_summary(self.name + "_loss", loss)]
+                for i, (layer_loss, (encode_weights, _, _)) in enumerate(zip(self.layer_losses, self.layers)):
+                    self.summaries.append(tf.scalar_summary(self.name + "_layer_%i_loss" % i, layer_loss))
+                    self.summaries.append(tf.histogram_summary(self.name + "_layer_%i_encode_weights" % i, encode_weights))
+
+            # initalize all new variables
+            self.session.run(tf.initialize_variables(set(tf.all_variables()) - temp))
+
+            # attach reference to ourselve for recursive plot.
+            pretrain_op.sender = self
+            finetune_op.sender = self
+            encoded.sender = self
+
+            self.pretrain_op = pretrain_op
+            self.finetune_op = finetune_op
+            self.train_op = pretrain_op if self.phase == "pretrain" else finetune_op
+            self.output_tensor = encoded
+            self.loss_tensor = loss
+            self.sample_weights = sample_weights
+
+            # bottom layer, rows of these are carried over on rewiring
+            self.encode_weights, self.encode_biases, self.decode_biases = self.layers[0]
+            self.variable_scope = variable_scope
 
         return
 
-    def get_output_tensor(self):
-        if self.output_tensor is None:
-            self.initialize_graph()
+    def set_phase(self, phase):
+        # architectures group train ops, call update_train_op on them afterwards
+        if phase not in self.PHASES:
+            raise ValueError("StackedAutoEncoderNode - unknown phase " + str(phase))
 
-        return self.output_tensor
+        self.phase = phase
 
-    def initialize_graph(self):
-        self.train_op = []
+        if self.output_tensor is not None:
+            self.train_op = self.pretrain_op if self.phase == "pretrain" else self.finetune_op
 
-        for i, ae in enumerate(self.autoencoders):
-            if (i > 0):
-                ae.register_tensor(self.autoencoders[i - 1].get_output_tensor())
+    def build_inference_graph(self, precision):
+        self.get_output_tensor()
 
-            if (i == len(self.autoencoders) - 1):
-                self.output_tensor = ae.get_output_tensor()
+        temp = set(tf.all_variables())
 
-        for ae in self.autoencoders:
-            self.train_op.append(ae.train_op)
+        with tf.name_scope(self.scope):
+            with tf.name_scope("inference_" + precision):
+                x = tf.concat(1, [self.inference_input(tensor) for tensor in self.input_tensors])
+                layers = [self.inference_weights(precision, "_%i" % i, *layer) for i, layer in enumerate(self.layers)]
+                encoded, loss, sample_loss, sync_op = self.inference_layers(x, layers, self.activations)
 
-    # I/O
-    def register_tensor(self, new_tensor):
-        # TODO: check if graph is initialized and modify for new input_dim
-        self.autoencoders[0].register_tensor(new_tensor)
-        return
+        self.session.run(tf.initialize_variables(set(tf.all_variables()) - temp))
 
-    def deregister_tensor(self, tensor):
-        # TODO: check if graph is initialized and modify for new input_dim
-        return
+        encoded.sender = self
 
-    # Persistence
-    def load(self, filename):
-        """Retrieve model from disk."""
-        return
+        return encoded, loss, sample_loss, sync_op
+
+    def rebuild_graph(self, previous_tensors, carried_tensors):
+        # the bottom layer is carried over by row, all layers above as they are
+        upper_layers = self.session.run([list(layer) for layer in self.layers[1:]])
+
+        super(StackedAutoEncoderNode, self).rebuild_graph(previous_tensors, carried_tensors)
+
+        self.session.run([variable.assign(value)
+                          for layer, values in zip(self.layers[1:], upper_layers)
+                          for variable, value in zip(layer, values)])
 
-    def save(self, filename):
-        """Save model to disk."""
         return
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+
+import tensorflow as tf
+import numpy as np
+
+from tensorflow_node import AutoEncoderNode
+from tensorflow_node import OpenCVInputLayer
+
+
+# compares reconstruction loss and throughput of the inference precisions.
+# int8 is an accuracy simulation only, nodes don't offer it: weights are
+# dequantized to float32 for a float32 matmul, so it is slower than float32.
+# run with: python benchmark_precision.py --benchmarks=.
+class PrecisionBenchmark(tf.test.Benchmark):
+
+    batch_size = 250
+    output_size = (28, 28)
+    iterations = 200
+
+    def frames(self):
+        # smooth blobs, so the autoencoder has something to reconstruct
+        ys, xs = np.mgrid[0:self.output_size[0], 0:self.output_size[1]]
+        centers = np.random.rand(self.batch_size, 2) * self.output_size
+        dist = (ys[None] - centers[:, 0, None, None]) ** 2 + (xs[None] - centers[:, 1, None, None]) ** 2
+        frames = np.exp(-dist / 20.0) * 255
+        return frames.reshape((self.batch_size,) + self.output_size + (1,)).astype(np.uint8)
+
+    def int8_simulation(self, sess, ae):
+        # int8 encode weights with one scale per hidden unit, dequantized for the matmul
+        input_dim, hidden_dim = ae.encode_weights.get_shape()
+
+        with tf.variable_scope("int8_simulation"):
+            quantized_weights = tf.get_variable("encode_weights", (input_dim, hidden_dim), dtype=tf.int8, initializer=tf.zeros_initializer, trainable=False)
+            scales = tf.get_variable("scales", (hidden_dim), initializer=tf.zeros_initializer, trainable=False)
+
+        new_scales = tf.maximum(tf.reduce_max(tf.abs(ae.encode_weights), 0) / 127.0, 1e-8)
+        sync_op = tf.group(quantized_weights.assign(tf.cast(tf.round(ae.encode_weights / new_scales), tf.int8)),
+                           scales.assign(new_scales))
+
+        x = tf.concat(1, [ae.inference_input(tensor) for tensor in ae.input_tensors])
+        layer = (tf.cast(quantized_weights, tf.float32) * scales, ae.encode_biases, ae.decode_biases, sync_op)
+
+        sess.run(tf.initialize_variables([quantized_weights, scales]))
+
+        return ae.inference_layers(x, [layer], [ae.activation])
+
+    def benchmarkPrecisions(self):
+        frames = self.frames()
+        results = []
+
+        for dtype in ["float32", "uint8"]:
+            with tf.Graph().as_default(), tf.Session() as sess:
+                inputlayer = OpenCVInputLayer(output_size=self.output_size, batch_size=self.batch_size, dtype=dtype)
+                data = frames if dtype == "uint8" else frames / 255.0
+
+                ae = AutoEncoderNode(session=sess, name="benchmark", hidden_dim=40, noise_type="none")
+                ae.register_tensor(inputlayer.get_tensor_for_region([0, 0, self.output_size[0], self.output_size[1]]))
+                ae.get_output_tensor()
+
+                feed_dict = {inputlayer.name + "/input:0": data}
+
+                for _ in xrange(self.iterations):
+                    sess.run(ae.train_op, feed_dict=feed_dict)
+
+                for precision in ["float32", "float16", "int8"]:
+                    if precision == "int8":
+                        encoded, loss, _, sync_op = self.int8_simulation(sess, ae)
+                    else:
+                        encoded, loss, _, sync_op = ae.build_inference_graph(precision)
+                    sess.run(sync_op)
+
+                    # warmup
+                    sess.run(encoded, feed_dict=feed_dict)
+
+                    start = time.time()
+                    for _ in xrange(self.iterations):
+                        sess.run(encoded, feed_dict=feed_dict)
+                    wall_time = (time.time() - start) / self.iterations
+
+                    reconstruction_loss = sess.run(loss, feed_dict=feed_dict)
+
+                    name = "ae_inference_%s_input_%s" % (dtype, precision)
+                    self.report_benchmark(iters=self.iterations,
+                                          wall_time=wall_time,
+                                          name=name,
+                                          extras={"reconstruction_loss": float(reconstruction_loss),
+                                                  "frames_per_second": self.batch_size / wall_time,
+                                                  "simulated": precision == "int8"})
+                    results.append((dtype, precision, reconstruction_loss, self.batch_size / wall_time))
+
+        print("%-8s %-10s %-12s %s" % ("input", "precision", "loss", "frames/s"))
+        for dtype, precision, reconstruction_loss, fps in results:
+            note = "  (accuracy simulation, dequantized float32 matmul)" if precision == "int8" else ""
+            print("%-8s %-10s %-12.6f %.0f%s" % (dtype, precision, reconstruction_loss, fps, note))
+
+
+if __name__ == '__main__':
+    tf.test.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import tempfile
+import time
+import os
+
+import tensorflow as tf
+import numpy as np
+
+from tensorflow_node import AutoEncoderNode
+from tensorflow_node import OpenCVInputLayer
+from tensorflow_node import BeliefCache
+from tensorflow_node import QueryServer
+from tensorflow_node import QueryClient
+
+
+# measures round trip latency of state and encode queries on an idle server
+# run with: python benchmark_query.py --benchmarks=.
+class QueryServerBenchmark(tf.test.Benchmark):
+
+    batch_size = 10
+    output_size = (28, 28)
+    iterations = 500
+
+    def round_trips(self, request):
+        # warmup
+        request()
+
+        latencies = []
+        for _ in xrange(self.iterations):
+            start = time.time()
+            request()
+            latencies.append(time.time() - start)
+
+        return np.array(latencies)
+
+    def benchmarkRoundTrips(self):
+        socket_path = os.path.join(tempfile.mkdtemp(), "query.sock")
+
+        with tf.Graph().as_default(), tf.Session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=self.output_size, batch_size=self.batch_size)
+
+            ae = AutoEncoderNode(session=sess, name="benchmark", hidden_dim=40)
+            ae.register_tensor(inputlayer.get_tensor_for_region([0, 0, self.output_size[0], self.output_size[1]]))
+
+            class Architecture(object):
+                nodes = [ae]
+
+            cache = BeliefCache()
+            cache.update({ae.name: np.random.rand(self.batch_size, 40).astype(np.float32)}, 0, 0.0)
+
+            server = QueryServer(sess, Architecture(), inputlayer, cache, socket_path)
+            server.start()
+
+            try:
+                client = QueryClient(socket_path)
+                frame = np.random.rand(1, self.output_size[0], self.output_size[1], 1).astype(np.float32)
+
+                requests = [("state", lambda: client.state(ae.name)),
+                            ("encode", lambda: client.encode(frame, [ae.name]))]
+
+                print("%-8s %-10s %-10s %s" % ("query", "mean_ms", "median_ms", "p99_ms"))
+                for name, request in requests:
+                    latencies = self.round_trips(request)
+
+                    self.report_benchmark(iters=self.iterations,
+                                          wall_time=latencies.mean(),
+                                          name="query_%s_round_trip" % name,
+                                          extras={"median_ms": np.median(latencies) * 1000,
+                                                  "p99_ms": np.percentile(latencies, 99) * 1000})
+                    print("%-8s %-10.3f %-10.3f %.3f" % (name, latencies.mean() * 1000,
+                                                         np.median(latencies) * 1000,
+                                                         np.percentile(latencies, 99) * 1000))
+
+                client.close()
+            finally:
+                server.stop()
+
+
+if __name__ == '__main__':
+    tf.test.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import time
+
+import tensorflow as tf
+import numpy as np
+
+from tensorflow_node import DestinArchitecture
+from tensorflow_node import OpenCVInputLayer
+from tensorflow_node import SessionProfile
+from tensorflow_node.utils.session_profile import set_affinity
+
+
+# measures DeSTIN training throughput for threading profiles per core count
+# run with: python benchmark_session.py --benchmarks=.
+class SessionProfileBenchmark(tf.test.Benchmark):
+
+    batch_size = 250
+    output_size = [28, 28]
+    iterations = 50
+
+    def profiles(self, cores):
+        cpus = range(cores)
+        thread_counts = sorted(set([1, max(cores // 2, 1), cores]))
+
+        for intra in thread_counts:
+            for inter in thread_counts:
+                for optimizer_level in ["L0", "L1"]:
+                    yield SessionProfile(intra_op_threads=intra,
+                                         inter_op_threads=inter,
+                                         cpus=cpus,
+                                         optimizer_level=optimizer_level,
+                                         per_session_threads=True)
+
+    def run_profile(self, profile, grouped):
+        data = np.random.rand(self.batch_size, self.output_size[0], self.output_size[1], 1)
+
+        with tf.Graph().as_default() as graph, profile.create_session(graph) as sess:
+            inputlayer = OpenCVInputLayer(output_size=self.output_size, batch_size=self.batch_size)
+            architecture = DestinArchitecture(sess, inputlayer, "AutoEncoderNode", {"hidden_dim": 40})
+
+            train_op = architecture.train_op
+            if not grouped:
+                train_op = [node.train_op for node in architecture.nodes]
+
+            feed_dict = {inputlayer.name + "/input:0": data}
+
+            # warmup
+            sess.run(train_op, feed_dict=feed_dict)
+
+            start = time.time()
+            for _ in xrange(self.iterations):
+                sess.run(train_op, feed_dict=feed_dict)
+
+            return (time.time() - start) / self.iterations
+
+    def benchmarkProfiles(self):
+        # without pinning every core count would run on all cores
+        all_cpus = range(multiprocessing.cpu_count())
+        if not set_affinity(all_cpus):
+            print("cpu pinning is not available on this platform, skipping profiles per core count")
+            return
+
+        cores = 1
+        best = []
+
+        while cores <= multiprocessing.cpu_count():
+            results = []
+
+            for profile in self.profiles(cores):
+                for grouped in [False, True]:
+                    wall_time = self.run_profile(profile, grouped)
+                    name = "destin_train_cores_%i_intra_%i_inter_%i_%s_%s" % (
+                        cores, profile.intra_op_threads, profile.inter_op_threads,
+                        profile.optimizer_level, "grouped" if grouped else "list")
+
+                    self.report_benchmark(iters=self.iterations,
+                                          wall_time=wall_time,
+                                          name=name,
+                                          extras={"frames_per_second": self.batch_size / wall_time})
+                    results.append((wall_time, profile, grouped))
+
+            best.append((cores, min(results, key=lambda result: result[0])))
+            cores *= 2
+
+        set_affinity(all_cpus)
+
+        print("%-6s %-6s %-6s %-6s %-8s %s" % ("cores", "intra", "inter", "opt", "train_op", "frames/s"))
+        for cores, (wall_time, profile, grouped) in best:
+            print("%-6i %-6i %-6i %-6s %-8s %.0f" % (cores, profile.intra_op_threads, profile.inter_op_threads,
+                                                     profile.optimizer_level, "grouped" if grouped else "list",
+                                                     self.batch_size / wall_time))
+
+
+if __name__ == '__main__':
+    tf.test.main()
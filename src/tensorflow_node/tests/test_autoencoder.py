@@ -9,6 +9,7 @@ import numpy as np
 from tensorflow_node import AutoEncoderNode
 from tensorflow_node import SummaryWriter
 from tensorflow_node import OpenCVInputLayer
+from tensorflow_node.architectures import NetworkArchitecture
 
 
 # this tests very basic functionality of the autoencoder
@@ -29,6 +30,111 @@ class AutoencoderTest(tf.test.TestCase):
             assert(result.shape[0] == 250)
             assert(result.shape[1] == 32)
 
+    def testRegisterOnInitializedGraph(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=250)
+            data = np.random.rand(250, 16, 16, 1)
+            feed_dict = {inputlayer.name + "/input:0": data}
+
+            tensor_a = inputlayer.get_tensor_for_region([0, 0, 8, 8])
+            tensor_b = inputlayer.get_tensor_for_region([8, 0, 8, 8])
+
+            ae = AutoEncoderNode(session=sess)
+            ae.register_tensor(tensor_a)
+            ae.get_output_tensor()
+
+            weights_a = ae.encode_weights.eval()
+            assert(weights_a.shape == (64, 32))
+
+            # add an input: rows of the existing input are kept
+            ae.register_tensor(tensor_b)
+            weights_ab = ae.encode_weights.eval()
+
+            assert(weights_ab.shape == (128, 32))
+            assert((weights_ab[:64] == weights_a).all())
+            assert(ae.get_output_tensor().eval(feed_dict=feed_dict).shape == (250, 32))
+
+            # remove the first input: rows of the second input move up
+            ae.deregister_tensor(tensor_a)
+            weights_b = ae.encode_weights.eval()
+
+            assert(weights_b.shape == (64, 32))
+            assert((weights_b == weights_ab[64:]).all())
+            assert(ae.get_output_tensor().eval(feed_dict=feed_dict).shape == (250, 32))
+
+    def testRemoveNode(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=250)
+            tensor_a = inputlayer.get_tensor_for_region([0, 0, 8, 8])
+            tensor_b = inputlayer.get_tensor_for_region([8, 0, 8, 8])
+
+            architecture = NetworkArchitecture()
+            bottom_a = architecture.add_node(sess, "AutoEncoderNode", {"name": "bottom_a"}, [tensor_a], level=2)
+            bottom_b = architecture.add_node(sess, "AutoEncoderNode", {"name": "bottom_b"}, [tensor_b], level=2)
+            middle = architecture.add_node(sess, "AutoEncoderNode", {"name": "middle"}, [bottom_a.get_output_tensor()], level=1)
+            top = architecture.add_node(sess, "AutoEncoderNode", {"name": "top"},
+                                        [middle.get_output_tensor(), bottom_b.get_output_tensor()], level=0)
+
+            # an initialized node keeps at least one input
+            with self.assertRaises(ValueError):
+                middle.deregister_tensor(bottom_a.get_output_tensor())
+
+            # middle loses its only input and goes too, top keeps bottom_b
+            architecture.remove_node(bottom_a)
+
+            assert(architecture.nodes == [bottom_b, top])
+            assert(len(top.input_tensors) == 1)
+            assert(top.input_tensors[0] is bottom_b.get_output_tensor())
+            assert(top.encode_weights.eval().shape == (32, 32))
+
+    def testApplyCommand(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=250)
+            feed_dict = {inputlayer.name + "/input:0": np.random.rand(250, 16, 16, 1)}
+
+            architecture = NetworkArchitecture()
+            bottom = architecture.apply_command(sess, inputlayer, {"op": "add", "type": "AutoEncoderNode",
+                                                                   "params": {"name": "bottom"}, "inputs": [[0, 0, 8, 8]], "level": 1})
+            top = architecture.apply_command(sess, inputlayer, {"op": "add", "type": "AutoEncoderNode",
+                                                                "params": {"name": "top"}, "inputs": ["bottom"]})
+
+            architecture.apply_command(sess, inputlayer, {"op": "connect", "node": "bottom", "input": [8, 8, 8, 8]})
+            assert(bottom.encode_weights.eval().shape == (128, 32))
+            assert(top.input_tensors[0] is bottom.get_output_tensor())
+
+            architecture.apply_command(sess, inputlayer, {"op": "disconnect", "node": "bottom", "input": [0, 0, 8, 8]})
+            assert(bottom.encode_weights.eval().shape == (64, 32))
+            assert(top.get_output_tensor().eval(feed_dict=feed_dict).shape == (250, 32))
+
+            with self.assertRaises(KeyError):
+                architecture.apply_command(sess, inputlayer, {"op": "remove", "node": "missing"})
+
+            architecture.apply_command(sess, inputlayer, {"op": "remove", "node": "bottom"})
+            assert(architecture.nodes == [])
+
+    def testInferencePrecisions(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=250, dtype="uint8")
+            data = np.floor(np.random.rand(250, 16, 16, 1) * 255).astype(np.uint8)
+            feed_dict = {inputlayer.name + "/input:0": data}
+
+            ae = AutoEncoderNode(session=sess, noise_type="none")
+            ae.register_tensor(inputlayer.get_tensor_for_region([0, 0, 16, 16]))
+
+            reference = ae.get_inference_tensor().eval(feed_dict=feed_dict)
+
+            for precision in ["float16"]:
+                encoded, loss, _, sync_op = ae.build_inference_graph(precision)
+                sess.run(sync_op)
+                result = encoded.eval(feed_dict=feed_dict)
+
+                assert(result.shape == (250, 32))
+                assert(np.abs(result - reference).max() < 0.05 * np.abs(reference).max())
+
+            # int8 is only simulated in the precision benchmark
+            with self.assertRaises(ValueError):
+                AutoEncoderNode(session=sess, precision="int8")
+
 
 if __name__ == '__main__':
     tf.test.main()
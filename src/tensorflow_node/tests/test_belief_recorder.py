@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging as log
+
+import tensorflow as tf
+import numpy as np
+
+from tensorflow_node import BeliefRecorder
+from tensorflow_node import BeliefReader
+
+
+# this tests writing beliefs to disk in batches and reading them back randomly
+class BeliefRecorderTest(tf.test.TestCase):
+
+    def testNpyRecording(self):
+        folder = self.get_temp_dir() + "/npy_beliefs"
+        data = np.random.rand(250, 32).astype(np.float32)
+
+        recorder = BeliefRecorder(folder, backend="npy", chunk_size=64)
+
+        for i in range(0, 250, 50):
+            recorder.record("ae_top", data[i:i + 50], np.arange(i, i + 50), np.repeat(float(i), 50))
+
+        recorder.close()
+
+        reader = BeliefReader(folder)
+
+        assert(reader.nodes == ["ae_top"])
+        assert(reader.length("ae_top") == 250)
+        assert((reader.states("ae_top") == data).all())
+        assert((reader.states("ae_top", [200, 3, 63, 64, -1]) == data[[200, 3, 63, 64, -1]]).all())
+        assert((reader.states("ae_top", 130) == data[130]).all())
+        assert((reader.frames("ae_top", slice(60, 70)) == np.arange(60, 70)).all())
+        assert(reader.timestamps("ae_top", 120) == 100.0)
+
+    def testCompressionRequiresHDF5(self):
+        with self.assertRaises(ValueError):
+            BeliefRecorder(self.get_temp_dir(), backend="npy", compression="gzip")
+
+
+if __name__ == '__main__':
+    tf.test.main()
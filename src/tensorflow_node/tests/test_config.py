@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging as log
+
+import tensorflow as tf
+
+from tensorflow_node import Config
+
+
+# this tests lookups in a parameter snapshot
+class ConfigTest(tf.test.TestCase):
+
+    def testGet(self):
+        config = Config({"publishing": {"summaries": True, "topic": "destin"},
+                         "inputlayer": {"params": {"batch_size": "250"}}})
+
+        assert(config.get("publishing/summaries") is True)
+        assert(config.get("publishing/topic") == "destin")
+        assert(config.get("inputlayer/params/batch_size", type=int) == 250)
+        assert(config.get("training/iterations", 50) == 50)
+        assert(config.get("publishing/topic/name", None) is None)
+
+        with self.assertRaises(KeyError):
+            config.get("publishing/summary_folder")
+
+
+if __name__ == '__main__':
+    tf.test.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging as log
+
+import tensorflow as tf
+import numpy as np
+
+from tensorflow_node import HandcodedDestinArchitecture
+from tensorflow_node import IncrementalInference
+from tensorflow_node import OpenCVInputLayer
+
+
+# this tests that only nodes above changed regions are recomputed
+class IncrementalInferenceTest(tf.test.TestCase):
+
+    def testIncrementalInference(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(28, 28), batch_size=10)
+            architecture = HandcodedDestinArchitecture(sess, inputlayer, "AutoEncoderNode", {"noise_type": "none"})
+            incremental = IncrementalInference(sess, architecture, inputlayer, threshold=0.01)
+
+            data = np.random.rand(10, 28, 28, 1)
+
+            def full_run(data):
+                feed_dict = {inputlayer.name + "/input:0": data}
+                return sess.run([node.get_inference_tensor() for node in architecture.nodes], feed_dict=feed_dict)
+
+            incremental.run({inputlayer.name + "/input:0": data})
+            assert(incremental.recomputed == 5)
+
+            # same frame, everything is cached
+            incremental.run({inputlayer.name + "/input:0": data})
+            assert(incremental.recomputed == 0)
+
+            # change the region of the first bottom node only
+            data[:, 0:14, 0:14, :] = np.random.rand(10, 14, 14, 1)
+            states = incremental.run({inputlayer.name + "/input:0": data})
+            assert(incremental.recomputed == 2)
+
+            for node, expected in zip(architecture.nodes, full_run(data)):
+                self.assertAllClose(states[node], expected)
+
+
+if __name__ == '__main__':
+    tf.test.main()
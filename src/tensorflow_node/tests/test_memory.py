@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging as log
+
+import numpy as np
+import tensorflow as tf
+
+from tensorflow_node import MemoryMonitor
+from tensorflow_node import AutoEncoderNode
+from tensorflow_node import OpenCVInputLayer
+from tensorflow_node.architectures import NetworkArchitecture
+from tensorflow_node.architectures import DestinArchitecture
+
+
+# this tests memory accounting of a node, a finalized graph and stable node names
+class MemoryMonitorTest(tf.test.TestCase):
+
+    def testReport(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=250)
+
+            architecture = NetworkArchitecture()
+            node = architecture.add_node(sess, "AutoEncoderNode", {"name": "ae_memory"},
+                                         [inputlayer.get_tensor_for_region([0, 0, 16, 16])])
+            node.get_inference_tensor()
+
+            inputlayer.batch = [np.zeros((16, 16, 1), dtype=np.float32)] * 10
+
+            monitor = MemoryMonitor(sess, architecture, inputlayer)
+            report = monitor.report()
+
+            # input copy, encode weights, encode biases, decode biases
+            variables = (250 * 256 + 256 * 32 + 32 + 256) * 4
+
+            assert(report["nodes"]["ae_memory"]["variables"] == variables)
+            assert(report["nodes"]["ae_memory"]["optimizer"] >= 2 * variables)
+            assert(report["input"] == 10 * 16 * 16 * 4)
+            assert(report["rss"] > 0)
+
+            # a finalized graph can still be reported on, but not extended
+            sess.graph.finalize()
+            assert(monitor.log()["ops"] == report["ops"])
+
+            with self.assertRaises(RuntimeError):
+                tf.constant(0)
+
+    def testDestinNodeNames(self):
+        names = []
+
+        # two independent builds, as after a restart of the daemon
+        for _ in xrange(2):
+            with tf.Graph().as_default(), tf.Session() as sess:
+                inputlayer = OpenCVInputLayer(output_size=(28, 28), batch_size=10)
+                architecture = DestinArchitecture(sess, inputlayer, "AutoEncoderNode", {"hidden_dim": 8},
+                                                  receptive_field=[14, 14], stride=[7, 7])
+                names.append([node.name for node in architecture.nodes])
+
+                # overlapping subtrees still get a node and a variable scope each
+                assert(len(architecture.nodes) == 21)
+                assert(len(set(names[-1])) == len(names[-1]))
+
+                report = MemoryMonitor(sess, architecture, inputlayer).report()
+                assert(report["other_variables"] == 0)
+                assert(all(node["variables"] > 0 for node in report["nodes"].values()))
+
+        assert(names[0] == names[1])
+
+
+if __name__ == '__main__':
+    tf.test.main()
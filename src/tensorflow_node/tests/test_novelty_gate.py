@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging as log
+
+import numpy as np
+import tensorflow as tf
+
+from tensorflow_node import NoveltyGate
+from tensorflow_node import AutoEncoderNode
+from tensorflow_node import OpenCVInputLayer
+
+
+# this tests gating of training on the reconstruction error
+class NoveltyGateTest(tf.test.TestCase):
+
+    def testGate(self):
+        gate = NoveltyGate(k=2.0, momentum=0.9, min_fraction=0.05, warmup=3)
+        errors = np.random.RandomState(0).uniform(0.99, 1.01, 100)
+
+        # warmup trains on everything
+        for _ in xrange(3):
+            assert((gate.update("ae", errors) == 1).all())
+
+        # familiar input is skipped
+        assert(gate.update("ae", errors) is None)
+
+        # only the novel samples are trained on
+        novel = errors.copy()
+        novel[:10] = 2.0
+        weights = gate.update("ae", novel)
+        assert((weights[:10] == 1).all())
+        assert((weights[10:] == 0).all())
+
+        # nodes are tracked independently
+        assert((gate.update("other", errors) == 1).all())
+
+    def testRepeatedInputSkipped(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=250)
+            feed_dict = {inputlayer.name + "/input:0": np.random.rand(250, 16, 16, 1)}
+
+            ae = AutoEncoderNode(session=sess, noise_type="none")
+            ae.register_tensor(inputlayer.get_tensor_for_region([0, 0, 16, 16]))
+            sample_loss = ae.get_sample_loss_tensor()
+
+            gate = NoveltyGate(warmup=5)
+            decisions = []
+
+            # the same batch over and over, as a static camera would deliver
+            for _ in xrange(40):
+                weights = gate.update(ae.name, sample_loss.eval(feed_dict=feed_dict))
+                decisions.append(weights is not None)
+
+                if weights is not None:
+                    train_feed_dict = dict(feed_dict)
+                    train_feed_dict[ae.sample_weights] = weights
+                    for _ in xrange(10):
+                        sess.run(ae.train_op, feed_dict=train_feed_dict)
+
+            assert(all(decisions[:5]))
+            assert(not any(decisions[-10:]))
+
+    def testSampleLoss(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=250)
+            data = np.random.rand(250, 16, 16, 1)
+            feed_dict = {inputlayer.name + "/input:0": data}
+
+            ae = AutoEncoderNode(session=sess, noise_type="none")
+            ae.register_tensor(inputlayer.get_tensor_for_region([0, 0, 16, 16]))
+
+            errors, loss = sess.run([ae.get_sample_loss_tensor(), ae.inference_loss], feed_dict=feed_dict)
+            assert(errors.shape == (250,))
+            assert(np.allclose(np.sqrt(np.mean(np.square(errors))), loss, rtol=1e-4))
+
+            # samples with zero weight don't contribute to the training loss
+            weights = np.zeros(250, dtype=np.float32)
+            weights[:125] = 1
+            changed = data.copy()
+            changed[125:] = 1 - changed[125:]
+
+            loss = ae.loss_tensor.eval(feed_dict={inputlayer.name + "/input:0": data, ae.sample_weights: weights})
+            changed_loss = ae.loss_tensor.eval(feed_dict={inputlayer.name + "/input:0": changed, ae.sample_weights: weights})
+            assert(np.allclose(loss, changed_loss))
+
+
+if __name__ == '__main__':
+    tf.test.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging as log
+
+import tensorflow as tf
+import numpy as np
+
+from tensorflow_node import AutoEncoderNode
+from tensorflow_node import OpenCVInputLayer
+from tensorflow_node import BeliefCache
+from tensorflow_node import QueryServer
+from tensorflow_node import QueryClient
+
+
+# this tests state queries and on-demand encoding over the unix socket
+class QueryServerTest(tf.test.TestCase):
+
+    def testQueries(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=10)
+
+            ae = AutoEncoderNode(session=sess)
+            ae.register_tensor(inputlayer.get_tensor_for_region([0, 0, 16, 16]))
+
+            class Architecture(object):
+                nodes = [ae]
+
+            cache = BeliefCache()
+            server = QueryServer(sess, Architecture(), inputlayer, cache, self.get_temp_dir() + "/query.sock")
+            server.start()
+
+            try:
+                client = QueryClient(self.get_temp_dir() + "/query.sock")
+                assert(client.nodes() == [ae.name])
+
+                states = np.random.rand(10, 32).astype(np.float32)
+                cache.update({ae.name: states}, 9, 0.0)
+                self.assertAllClose(client.state(ae.name), states[-1])
+                self.assertAllClose(client.state(ae.name, batch=True), states)
+
+                # fewer frames than one batch are padded on the server
+                frames = np.random.rand(3, 16, 16, 1).astype(np.float32)
+                batch = np.zeros((10, 16, 16, 1), dtype=np.float32)
+                batch[:3] = frames
+                expected = ae.get_inference_tensor().eval(feed_dict={inputlayer.name + "/input:0": batch})[:3]
+
+                self.assertAllClose(client.encode(frames)[ae.name], expected)
+
+                with self.assertRaises(RuntimeError):
+                    client.state("unknown")
+
+                client.close()
+            finally:
+                server.stop()
+
+
+if __name__ == '__main__':
+    tf.test.main()
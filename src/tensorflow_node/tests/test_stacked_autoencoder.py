@@ -9,6 +9,7 @@ import numpy as np
 from tensorflow_node import StackedAutoEncoderNode
 from tensorflow_node import SummaryWriter
 from tensorflow_node import OpenCVInputLayer
+from tensorflow_node.architectures import NetworkArchitecture
 
 
 # this tests very basic functionality of the stacked autoencoder
@@ -28,6 +29,67 @@ class StackedAutoencoderTest(tf.test.TestCase):
             assert(result.shape[0] == 250)
             assert(result.shape[1] == 32)
 
+    def testSAEPhases(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=250)
+            data = np.random.rand(250, 16, 16, 1)
+            feed_dict = {inputlayer.name + "/input:0": data}
+
+            sae = StackedAutoEncoderNode(session=sess, hidden_dims=[64, 32, 16], activations=["sigmoid", "sigmoid", "linear"])
+            sae.register_tensor(inputlayer.get_tensor_for_region([0, 0, 16, 16]))
+            output_tensor = sae.get_output_tensor()
+
+            assert(len(sae.layer_losses) == 3)
+            assert(sae.train_op is sae.pretrain_op)
+
+            # pretraining only changes each layer through its own loss
+            for i, layer_loss in enumerate(sae.layer_losses):
+                for j, (encode_weights, _, _) in enumerate(sae.layers):
+                    gradient = tf.gradients(layer_loss, encode_weights)[0]
+                    assert((gradient is not None) == (i == j))
+
+            # while fine-tuning the loss reaches down to the bottom layer
+            assert(tf.gradients(sae.loss_tensor, sae.layers[0][0])[0] is not None)
+
+            weights = sess.run([encode_weights for encode_weights, _, _ in sae.layers])
+            sess.run(sae.train_op, feed_dict=feed_dict)
+            for (encode_weights, _, _), previous in zip(sae.layers, weights):
+                assert((encode_weights.eval() != previous).any())
+
+            sae.set_phase("finetune")
+            assert(sae.train_op is sae.finetune_op)
+
+            losses = sess.run([sae.train_op, sae.loss_tensor] + sae.layer_losses, feed_dict=feed_dict)[1:]
+            assert(len(losses) == 4)
+
+            result = output_tensor.eval(feed_dict=feed_dict)
+            assert(result.shape == (250, 16))
+
+    def testRewireStackedReceiver(self):
+        with self.test_session() as sess:
+            inputlayer = OpenCVInputLayer(output_size=(16, 16), batch_size=250)
+            feed_dict = {inputlayer.name + "/input:0": np.random.rand(250, 16, 16, 1)}
+
+            architecture = NetworkArchitecture()
+            bottom = architecture.add_node(sess, "AutoEncoderNode", {"name": "bottom"},
+                                           [inputlayer.get_tensor_for_region([0, 0, 8, 8])], level=1)
+            top = architecture.add_node(sess, "StackedAutoEncoderNode", {"name": "top", "hidden_dims": [16, 8]},
+                                        [bottom.get_output_tensor()], level=0)
+
+            top_output = top.get_output_tensor()
+            upper_weights = top.layers[1][0].eval()
+
+            # rebuilding the sender moves the stacked receiver to its new output
+            architecture.connect(bottom, inputlayer.get_tensor_for_region([8, 8, 8, 8]))
+
+            assert(len(top.input_tensors) == 1)
+            assert(top.input_tensors[0] is bottom.get_output_tensor())
+            assert(top.get_output_tensor() is not top_output)
+            assert((top.layers[1][0].eval() == upper_weights).all())
+
+            result = sess.run([architecture.train_op, top.get_output_tensor()], feed_dict=feed_dict)[1]
+            assert(result.shape == (250, 8))
+
 
 if __name__ == '__main__':
     tf.test.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging as log
+
+import tensorflow as tf
+import numpy as np
+
+from tensorflow_node import SummaryWriter
+
+
+# this tests the tiling of vectors into image grids
+class SummaryWriterTest(tf.test.TestCase):
+
+    def testImageGrid(self):
+        batch = np.random.rand(7, 16)
+        image = SummaryWriter.batch_of_1d_to_image_grid(batch)
+
+        # 3x3 grid of 4x4 tiles with 1 pixel border
+        assert(image.shape == (18, 18))
+        assert(image.min() == 0.0 and image.max() == 1.0)
+
+        # grid is filled column by column
+        normalized = (batch[1] - batch[1].min()) / (batch[1].max() - batch[1].min())
+        self.assertAllClose(image[7:11, 1:5], normalized.reshape(4, 4))
+
+        # empty grid cells stay black
+        assert((image[12:, 12:] == 0).all())
+
+    def testImageGridPadding(self):
+        # 10 values are padded to a 4x4 tile
+        image = SummaryWriter.batch_of_1d_to_image_grid(np.random.rand(4, 10))
+        assert(image.shape == (12, 12))
+        assert((image[3, 3:5] == 0).all())
+        assert((image[4, 1:5] == 0).all())
+
+    def testImageGridChannels(self):
+        image = SummaryWriter.batch_of_1d_to_image_grid(np.random.rand(5, 24), data_shape=[2, 4], channels=3)
+        assert(image.shape == (12, 18, 3))
+
+        reused = SummaryWriter.batch_of_1d_to_image_grid(np.random.rand(5, 24), data_shape=[2, 4], channels=3, out=image)
+        assert(np.may_share_memory(reused, image))
+
+
+if __name__ == '__main__':
+    tf.test.main()
@@ -1 +1,10 @@
 from .summary_writer import SummaryWriter
+from .belief_recorder import BeliefRecorder
+from .belief_recorder import BeliefReader
+from .session_profile import SessionProfile
+from .config import Config
+from .query_server import BeliefCache
+from .query_server import QueryServer
+from .query_server import QueryClient
+from .novelty_gate import NoveltyGate
+from .memory import MemoryMonitor
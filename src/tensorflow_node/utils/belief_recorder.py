@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import numpy as np
+from os.path import join as pjoin
+
+import rospy
+
+
+class BeliefRecorder(object):
+    """
+    Records the output states of network nodes to disk for offline analysis.
+
+    Every node gets its own appendable arrays for states, frame indices and
+    timestamps. With the 'npy' backend these are fixed size .npy chunks that
+    are memory-mapped, with the 'hdf5' backend they are resizable, chunked and
+    optionally compressed h5py datasets.
+    """
+
+    def __init__(self, folder, backend="npy", compression=None, chunk_size=1024):
+        if backend not in _WRITERS:
+            raise ValueError("BeliefRecorder - unknown backend '%s'" % backend)
+
+        if compression is not None and backend != "hdf5":
+            raise ValueError("BeliefRecorder - compression requires the hdf5 backend")
+
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.folder = folder
+        self.backend = backend
+        self.compression = compression
+        self.chunk_size = chunk_size
+
+        # these are created upon first call to record
+        self.writers = {}
+        self.h5file = None
+
+        rospy.logdebug("recording beliefs to " + folder)
+
+    def record(self, node_name, states, frame_indices, timestamps):
+        states = np.asarray(states, dtype=np.float32)
+        frame_indices = np.asarray(frame_indices, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+
+        if node_name not in self.writers:
+            self.writers[node_name] = self.create_writer(node_name, states.shape[1])
+
+        self.writers[node_name].append(states, frame_indices, timestamps)
+
+    def create_writer(self, node_name, dim):
+        if self.backend == "hdf5" and self.h5file is None:
+            h5py = _import_h5py()
+            self.h5file = h5py.File(pjoin(self.folder, _H5_FILENAME), "a")
+
+        return _WRITERS[self.backend](self, node_name, dim)
+
+    def flush(self):
+        for writer in self.writers.values():
+            writer.flush()
+
+        if self.h5file is not None:
+            self.h5file.flush()
+
+    def close(self):
+        self.flush()
+        self.writers = {}
+
+        if self.h5file is not None:
+            self.h5file.close()
+            self.h5file = None
+
+
+class BeliefReader(object):
+    """
+    Random access to recordings written by BeliefRecorder.
+
+    Indices can be integers, slices or integer arrays and are interpreted
+    the same way numpy does for a single array of length `length(node)`.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.readers = {}
+        self.h5file = None
+
+        if os.path.isfile(pjoin(folder, _H5_FILENAME)):
+            h5py = _import_h5py()
+            self.h5file = h5py.File(pjoin(folder, _H5_FILENAME), "r")
+            self.nodes = sorted(self.h5file.keys())
+        else:
+            self.nodes = sorted(name for name in os.listdir(folder)
+                                if os.path.isfile(pjoin(folder, name, _NPY_META)))
+
+    def reader(self, node_name):
+        if node_name not in self.readers:
+            if node_name not in self.nodes:
+                raise KeyError("BeliefReader - no recording for node '%s'" % node_name)
+
+            if self.h5file is not None:
+                self.readers[node_name] = _H5NodeReader(self.h5file[node_name])
+            else:
+                self.readers[node_name] = _NpyNodeReader(pjoin(self.folder, node_name))
+
+        return self.readers[node_name]
+
+    def length(self, node_name):
+        return self.reader(node_name).length
+
+    def states(self, node_name, index=slice(None)):
+        return self.reader(node_name).get("states", index)
+
+    def frames(self, node_name, index=slice(None)):
+        return self.reader(node_name).get("frames", index)
+
+    def timestamps(self, node_name, index=slice(None)):
+        return self.reader(node_name).get("timestamps", index)
+
+    def close(self):
+        self.readers = {}
+
+        if self.h5file is not None:
+            self.h5file.close()
+            self.h5file = None
+
+
+# Backends
+
+_H5_FILENAME = "beliefs.h5"
+_NPY_META = "meta.json"
+_FIELDS = [("states", np.float32), ("frames", np.int64), ("timestamps", np.float64)]
+
+
+def _import_h5py():
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError("BeliefRecorder - the hdf5 backend requires h5py to be installed")
+    return h5py
+
+
+def _normalize_index(index, length):
+    # turn any numpy style index into a flat array of positive integers
+    if isinstance(index, (int, np.integer)):
+        if index < -length or index >= length:
+            raise IndexError("BeliefReader - index %i out of range" % index)
+        return np.array([index % length]), True
+
+    return np.arange(length)[index].reshape(-1), False
+
+
+class _NpyNodeWriter(object):
+
+    def __init__(self, recorder, node_name, dim):
+        self.path = pjoin(recorder.folder, node_name)
+        self.chunk_size = recorder.chunk_size
+        self.dim = dim
+        self.length = 0
+
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        # continue an existing recording
+        if os.path.isfile(pjoin(self.path, _NPY_META)):
+            with open(pjoin(self.path, _NPY_META)) as f:
+                meta = json.load(f)
+
+            if meta["dim"] != dim or meta["chunk_size"] != self.chunk_size:
+                raise ValueError("BeliefRecorder - existing recording for %s has a different layout" % node_name)
+
+            self.length = meta["length"]
+
+        self.chunk = None
+        self.chunk_id = -1
+
+    def open_chunk(self, chunk_id):
+        self.flush_chunk()
+        self.chunk = {}
+
+        for field, dtype in _FIELDS:
+            filename = pjoin(self.path, "%s_%05i.npy" % (field, chunk_id))
+            shape = (self.chunk_size, self.dim) if field == "states" else (self.chunk_size,)
+
+            if os.path.isfile(filename):
+                self.chunk[field] = np.load(filename, mmap_mode="r+")
+            else:
+                self.chunk[field] = np.lib.format.open_memmap(filename, mode="w+", dtype=dtype, shape=shape)
+
+        self.chunk_id = chunk_id
+
+    def append(self, states, frame_indices, timestamps):
+        values = {"states": states, "frames": frame_indices, "timestamps": timestamps}
+        written = 0
+
+        while written < len(states):
+            chunk_id, offset = divmod(self.length, self.chunk_size)
+
+            if chunk_id != self.chunk_id:
+                self.open_chunk(chunk_id)
+
+            count = min(self.chunk_size - offset, len(states) - written)
+
+            for field, _ in _FIELDS:
+                self.chunk[field][offset:offset + count] = values[field][written:written + count]
+
+            written += count
+            self.length += count
+
+    def flush_chunk(self):
+        if self.chunk is not None:
+            for field, _ in _FIELDS:
+                self.chunk[field].flush()
+
+    def flush(self):
+        self.flush_chunk()
+
+        meta = {"dim": self.dim, "chunk_size": self.chunk_size, "length": self.length}
+        with open(pjoin(self.path, _NPY_META), "w") as f:
+            json.dump(meta, f)
+
+
+class _H5NodeWriter(object):
+
+    def __init__(self, recorder, node_name, dim):
+        if node_name in recorder.h5file:
+            self.group = recorder.h5file[node_name]
+
+            if self.group["states"].shape[1] != dim:
+                raise ValueError("BeliefRecorder - existing recording for %s has a different layout" % node_name)
+        else:
+            self.group = recorder.h5file.create_group(node_name)
+
+            for field, dtype in _FIELDS:
+                shape = (0, dim) if field == "states" else (0,)
+                self.group.create_dataset(field,
+                                          shape=shape,
+                                          maxshape=(None,) + shape[1:],
+                                          chunks=(recorder.chunk_size,) + shape[1:],
+                                          dtype=dtype,
+                                          compression=recorder.compression)
+
+    def append(self, states, frame_indices, timestamps):
+        values = {"states": states, "frames": frame_indices, "timestamps": timestamps}
+
+        for field, _ in _FIELDS:
+            dataset = self.group[field]
+            length = dataset.shape[0]
+            dataset.resize(length + len(states), axis=0)
+            dataset[length:] = values[field]
+
+    def flush(self):
+        pass
+
+
+_WRITERS = {"npy": _NpyNodeWriter, "hdf5": _H5NodeWriter}
+
+
+class _NpyNodeReader(object):
+
+    def __init__(self, path):
+        with open(pjoin(path, _NPY_META)) as f:
+            meta = json.load(f)
+
+        self.path = path
+        self.length = meta["length"]
+        self.chunk_size = meta["chunk_size"]
+        self.dim = meta["dim"]
+        self.chunks = {}
+
+    def chunk(self, field, chunk_id):
+        key = (field, chunk_id)
+        if key not in self.chunks:
+            self.chunks[key] = np.load(pjoin(self.path, "%s_%05i.npy" % key), mmap_mode="r")
+        return self.chunks[key]
+
+    def get(self, field, index):
+        indices, scalar = _normalize_index(index, self.length)
+        chunk_ids, offsets = np.divmod(indices, self.chunk_size)
+
+        shape = (len(indices), self.dim) if field == "states" else (len(indices),)
+        result = np.empty(shape, dtype=dict(_FIELDS)[field])
+
+        # gather per chunk, so each memmap is touched once
+        for chunk_id in np.unique(chunk_ids):
+            mask = chunk_ids == chunk_id
+            result[mask] = self.chunk(field, chunk_id)[offsets[mask]]
+
+        return result[0] if scalar else result
+
+
+class _H5NodeReader(object):
+
+    def __init__(self, group):
+        self.group = group
+        self.length = group["states"].shape[0]
+
+    def get(self, field, index):
+        indices, scalar = _normalize_index(index, self.length)
+
+        if len(indices) == 0:
+            return self.group[field][:0]
+
+        # h5py requires increasing, unique indices for fancy selection
+        unique, inverse = np.unique(indices, return_inverse=True)
+        result = self.group[field][unique.tolist()][inverse]
+
+        return result[0] if scalar else result
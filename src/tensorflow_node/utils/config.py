@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import rospy
+
+from std_msgs.msg import Empty
+
+
+class Config(object):
+    """
+    Snapshot of the tensorflow_node namespace on the parameter server.
+
+    Parameters are fetched once, lookups are served from memory so hot loops
+    never go to the ROS master. With hot reload enabled, publishing to the
+    reload topic takes a new snapshot and notifies the registered listeners.
+    """
+
+    _required = object()
+
+    def __init__(self, params, prefix="tensorflow_node"):
+        self.params = params
+        self.prefix = prefix
+        self.listeners = []
+        self.subscriber = None
+
+    @classmethod
+    def from_param_server(cls, prefix="tensorflow_node"):
+        return cls(rospy.get_param(prefix), prefix)
+
+    def get(self, path, default=_required, type=None):
+        """Looks up a '/' separated path, e.g. 'publishing/summaries'."""
+        value = self.params
+
+        for key in path.split("/"):
+            if not isinstance(value, dict) or key not in value:
+                if default is Config._required:
+                    raise KeyError("Config - parameter %s/%s not set" % (self.prefix, path))
+                return default
+            value = value[key]
+
+        if type is not None:
+            value = type(value)
+
+        return value
+
+    def enable_hot_reload(self, topic="reload"):
+        if self.subscriber is None:
+            topic_name = "/" + self.prefix + "/" + topic
+            self.subscriber = rospy.Subscriber(topic_name, Empty, self.reload)
+            rospy.loginfo("reloading parameters on messages to " + topic_name)
+
+    def on_reload(self, listener):
+        self.listeners.append(listener)
+
+    def reload(self, msg=None):
+        # runs in the subscriber thread, the snapshot is swapped in one assignment
+        self.params = rospy.get_param(self.prefix)
+        rospy.loginfo("reloaded parameters from " + self.prefix)
+
+        for listener in self.listeners:
+            listener(self)
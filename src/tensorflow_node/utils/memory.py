@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import re
+import resource
+import numpy as np
+import rospy
+import tensorflow as tf
+
+
+class MemoryMonitor(object):
+    """
+    Reports the memory held by the daemon, to check it runs in steady state.
+
+    A report holds the number of ops in the graph, for every node the bytes of
+    its variables and of its optimizer slots, the bytes of frames waiting in
+    the input layer and the resident set size of the process. Variables of
+    previous generations of a rebuilt node are counted for that node, other
+    variables as 'other'. The op count should stay constant once the daemon
+    is running, growth between reports is logged as a warning.
+    """
+
+    def __init__(self, session, architecture, inputlayer):
+        self.session = session
+        self.architecture = architecture
+        self.inputlayer = inputlayer
+        self.ops = None
+
+    def report(self):
+        ops = len(self.session.graph.get_operations())
+
+        # variables of a node live below its name, or its name with a generation suffix
+        patterns = [(node.name, re.compile(r"^%s(_\d+)?/" % re.escape(node.name))) for node in self.architecture.nodes]
+        nodes = dict((node.name, {"variables": 0, "optimizer": 0}) for node in self.architecture.nodes)
+        other = 0
+
+        with self.session.graph.as_default():
+            variables = tf.all_variables()
+
+        for variable in variables:
+            nbytes = variable_bytes(variable)
+            kind = "optimizer" if is_optimizer_variable(variable) else "variables"
+
+            for name, pattern in patterns:
+                if pattern.match(variable.name):
+                    nodes[name][kind] += nbytes
+                    break
+            else:
+                other += nbytes
+
+        return {"ops": ops,
+                "nodes": nodes,
+                "other_variables": other,
+                "input": sum(np.asarray(frame).nbytes for frame in self.inputlayer.batch),
+                "rss": process_rss()}
+
+    def log(self):
+        report = self.report()
+
+        variables = sum(node["variables"] for node in report["nodes"].values())
+        optimizer = sum(node["optimizer"] for node in report["nodes"].values())
+
+        rospy.loginfo("memory: %i ops, %.1f MB variables, %.1f MB optimizer, %.1f MB other variables, %.1f MB input, %.1f MB rss" %
+                      (report["ops"], variables / 1e6, optimizer / 1e6, report["other_variables"] / 1e6,
+                       report["input"] / 1e6, report["rss"] / 1e6))
+
+        for name in sorted(report["nodes"].keys()):
+            node = report["nodes"][name]
+            rospy.logdebug("memory: %s %i bytes variables, %i bytes optimizer" % (name, node["variables"], node["optimizer"]))
+
+        if self.ops is not None and report["ops"] > self.ops:
+            rospy.logwarn("memory: graph grew by %i ops since last report" % (report["ops"] - self.ops))
+        self.ops = report["ops"]
+
+        return report
+
+
+def variable_bytes(variable):
+    shape = variable.get_shape()
+    if not shape.is_fully_defined():
+        return 0
+    return int(np.prod(shape.as_list())) * variable.dtype.base_dtype.size
+
+
+def is_optimizer_variable(variable):
+    # slots are named after their variable, e.g. encode_weights/Adam_1, beta powers belong to Adam
+    return re.search(r"/(Adam|Adam_\d+|beta\d_power(_\d+)?|Momentum|Adagrad|RMSProp(_\d+)?)(:\d+)?$", variable.name) is not None
+
+
+def process_rss():
+    # current resident set size, peak resident set size where /proc is missing
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import math
+import numpy as np
+import rospy
+
+
+class NoveltyGate(object):
+    """
+    Decides per node which samples of a batch are worth training on.
+
+    For every node a moving mean and variance of the reconstruction error is
+    kept. A sample is novel if its error exceeds mean + k * std and floor.
+    The node skips training if less than min_fraction of the batch is novel,
+    which is where compute is saved. min_fraction has to be above the share
+    of samples beyond k standard deviations, about 16% for k = 1 and 2% for
+    k = 2 with normally distributed errors, or familiar input is never
+    skipped. floor is an absolute error below which input counts as known.
+
+    If a node trains, 'batch' mode trains it on the whole batch. 'samples'
+    mode only sets the loss weights of familiar samples to zero, the train op
+    still runs over the full batch and saves no compute. During the first
+    warmup batches of a node every batch is trained on completely while the
+    statistics settle.
+    """
+
+    MODES = ["samples", "batch"]
+
+    def __init__(self, k=2.0, momentum=0.99, min_fraction=0.1, floor=0.0, warmup=10, mode="samples"):
+        if mode not in self.MODES:
+            raise ValueError("NoveltyGate - unknown mode " + str(mode))
+
+        # share of normally distributed errors above mean + k * std
+        tail = 0.5 * math.erfc(k / math.sqrt(2))
+        if min_fraction <= tail:
+            rospy.logwarn("NoveltyGate - min_fraction %.3f is below the %.3f of samples beyond k = %.1f, familiar input will rarely be skipped"
+                          % (min_fraction, tail, k))
+
+        self.k = k
+        self.momentum = momentum
+        self.min_fraction = min_fraction
+        self.floor = floor
+        self.warmup = warmup
+        self.mode = mode
+
+        # node name -> [mean, variance, number of batches seen]
+        self.statistics = {}
+
+    def threshold(self, node_name):
+        mean, variance, _ = self.statistics[node_name]
+        return max(mean + self.k * np.sqrt(variance), self.floor)
+
+    def update(self, node_name, errors):
+        """
+        Returns loss weights for the samples of a batch given their errors, or
+        None if the node should not train on this batch.
+        """
+        errors = np.asarray(errors, dtype=np.float32)
+
+        if node_name not in self.statistics:
+            self.statistics[node_name] = [float(errors.mean()), float(errors.var()), 0]
+
+        mean, variance, count = self.statistics[node_name]
+
+        if count < self.warmup:
+            weights = np.ones(len(errors), dtype=np.float32)
+        else:
+            novel = errors > self.threshold(node_name)
+
+            if novel.mean() < self.min_fraction:
+                weights = None
+            elif self.mode == "samples":
+                weights = novel.astype(np.float32)
+            else:
+                weights = np.ones(len(errors), dtype=np.float32)
+
+        # errors of skipped batches count too, the statistics track the input
+        mean = self.momentum * mean + (1 - self.momentum) * float(errors.mean())
+        variance = self.momentum * variance + (1 - self.momentum) * float(np.square(errors - mean).mean())
+        self.statistics[node_name] = [mean, variance, count + 1]
+
+        return weights
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import socket
+import struct
+import threading
+import numpy as np
+import rospy
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class BeliefCache(object):
+    """
+    Latest states of all nodes, updated by the daemon after every batch.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.states = {}
+        self.frame_index = -1
+        self.timestamp = 0.0
+
+    def update(self, states, frame_index, timestamp):
+        # states maps node names to [batch, hidden_dim] arrays
+        with self.lock:
+            self.states = dict(states)
+            self.frame_index = frame_index
+            self.timestamp = timestamp
+
+    def get(self, node_name):
+        with self.lock:
+            if node_name not in self.states:
+                raise KeyError("no state for node " + node_name)
+            return self.states[node_name], self.frame_index, self.timestamp
+
+
+class QueryServer(object):
+    """
+    Local query service for node states on a Unix socket.
+
+    Messages in both directions are a 4 byte length, a JSON header and an
+    optional raw array payload described by the header. Supported requests:
+
+      {"op": "nodes"}                        names of all nodes
+      {"op": "state", "node": name}          latest cached state of a node
+      {"op": "encode", "nodes": [names],     encodes the frames in the payload,
+       "dtype": ..., "shape": [n, h, w]}     which match the input layer format
+
+    Encode requests that queue up while a batch is evaluated are evaluated
+    together in the next one on the shared inference path. With max_wait
+    set, the server additionally waits that many seconds after the first
+    request for more requests.
+    """
+
+    def __init__(self, session, architecture, inputlayer, cache, socket_path, max_wait=0.0):
+        self.session = session
+        self.inputlayer = inputlayer
+        self.cache = cache
+        self.socket_path = socket_path
+        self.max_wait = max_wait
+
+        self.refresh(architecture)
+        self.frame_shape = (inputlayer.output_size[0], inputlayer.output_size[1], 1)
+        self.frame_dtype = np.dtype(inputlayer.dtype)
+
+        self.requests = queue.Queue()
+        self.server = None
+
+    def refresh(self, architecture):
+        # resolve inference tensors up front, requests never add ops to the graph
+        tensors = dict((node.name, node.get_inference_tensor()) for node in architecture.nodes)
+        self.nodes = dict((node.name, node) for node in architecture.nodes)
+        self.tensors = tensors
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        self.server = _UnixServer(self.socket_path, _Handler)
+        self.server.query_server = self
+
+        for target in [self.server.serve_forever, self.encode_loop]:
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+        rospy.loginfo("answering queries on " + self.socket_path)
+
+    def stop(self):
+        # wakes up encode_loop, which blocks on the queue
+        self.requests.put(None)
+
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def handle(self, header, payload):
+        op = header.get("op")
+
+        if op == "nodes":
+            return {"nodes": sorted(self.nodes.keys())}, None
+
+        elif op == "state":
+            state, frame_index, timestamp = self.cache.get(header["node"])
+            if not header.get("batch", False):
+                state = state[-1]
+            return {"frame": frame_index, "timestamp": timestamp}, state
+
+        elif op == "encode":
+            frames = np.asarray(payload).reshape((-1,) + self.frame_shape).astype(self.frame_dtype)
+            node_names = header.get("nodes") or sorted(self.nodes.keys())
+
+            for name in node_names:
+                if name not in self.nodes:
+                    raise KeyError("unknown node " + name)
+
+            request = _EncodeRequest(frames, node_names)
+            self.requests.put(request)
+            request.done.wait()
+
+            if request.error is not None:
+                raise request.error
+
+            states = [request.results[name] for name in node_names]
+            return {"nodes": node_names, "dims": [state.shape[1] for state in states]}, np.concatenate(states, axis=1)
+
+        raise ValueError("unknown op " + str(op))
+
+    def encode_loop(self):
+        batch_size = self.inputlayer.batch_size
+
+        while True:
+            # timed waits poll with up to 50ms sleeps on python 2, block instead
+            request = self.requests.get()
+            if request is None:
+                return
+
+            pending = [request]
+            stopped = False
+
+            # collect queued requests until the batch is full or max_wait passed
+            count = len(request.frames)
+            deadline = time.time() + self.max_wait
+
+            while count < batch_size:
+                remaining = deadline - time.time()
+                try:
+                    if remaining > 0:
+                        request = self.requests.get(timeout=remaining)
+                    else:
+                        request = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+
+                if request is None:
+                    stopped = True
+                    break
+
+                pending.append(request)
+                count += len(request.frames)
+
+            self.encode(pending, batch_size)
+
+            if stopped:
+                return
+
+    def encode(self, pending, batch_size):
+        try:
+            frames = np.concatenate([request.frames for request in pending])
+            node_names = sorted(set(name for request in pending for name in request.node_names))
+            fetches = [self.tensors[name] for name in node_names]
+
+            results = dict((name, []) for name in node_names)
+
+            # the placeholder has a fixed batch size, pad the last chunk
+            for offset in range(0, len(frames), batch_size):
+                chunk = frames[offset:offset + batch_size]
+                batch = np.zeros((batch_size,) + self.frame_shape, dtype=self.frame_dtype)
+                batch[:len(chunk)] = chunk
+
+                states = self.session.run(fetches, feed_dict={self.inputlayer.input_placeholder: batch})
+
+                for name, state in zip(node_names, states):
+                    results[name].append(state[:len(chunk)])
+
+            results = dict((name, np.concatenate(states)) for name, states in results.items())
+
+            offset = 0
+            for request in pending:
+                count = len(request.frames)
+                request.results = dict((name, results[name][offset:offset + count]) for name in request.node_names)
+                offset += count
+
+        except Exception as e:
+            for request in pending:
+                request.error = e
+
+        for request in pending:
+            request.done.set()
+
+
+class QueryClient(object):
+    """
+    Client for QueryServer, keeps one connection open.
+    """
+
+    def __init__(self, socket_path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+
+    def nodes(self):
+        header, _ = self.request({"op": "nodes"})
+        return header["nodes"]
+
+    def state(self, node_name, batch=False):
+        header, state = self.request({"op": "state", "node": node_name, "batch": batch})
+        return state
+
+    def encode(self, frames, node_names=None):
+        """Returns a dict of node states for frames in the input layer format."""
+        header, states = self.request({"op": "encode", "nodes": node_names}, frames)
+
+        # states of all nodes are concatenated along the hidden dimension
+        result = {}
+        offset = 0
+        for name, dim in zip(header["nodes"], header["dims"]):
+            result[name] = states[:, offset:offset + dim]
+            offset += dim
+
+        return result
+
+    def request(self, header, payload=None):
+        _send(self.socket, header, payload)
+        header, payload = _receive(self.socket)
+
+        if "error" in header:
+            raise RuntimeError("QueryServer - " + header["error"])
+
+        return header, payload
+
+    def close(self):
+        self.socket.close()
+
+
+# Protocol
+
+def _send(sock, header, payload=None):
+    header = dict(header)
+
+    if payload is not None:
+        payload = np.ascontiguousarray(payload)
+        header["dtype"] = payload.dtype.str
+        header["shape"] = payload.shape
+        data = payload.tobytes()
+    else:
+        data = b""
+
+    header["nbytes"] = len(data)
+    encoded = json.dumps(header).encode("utf-8")
+    sock.sendall(struct.pack(">I", len(encoded)) + encoded + data)
+
+
+def _receive_exactly(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise EOFError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _receive(sock):
+    size, = struct.unpack(">I", _receive_exactly(sock, 4))
+    header = json.loads(_receive_exactly(sock, size).decode("utf-8"))
+    data = _receive_exactly(sock, header["nbytes"]) if header["nbytes"] > 0 else b""
+
+    payload = None
+    if "dtype" in header and "shape" in header and header["nbytes"] > 0:
+        payload = np.frombuffer(data, dtype=header["dtype"]).reshape(header["shape"])
+
+    return header, (payload if payload is not None else data)
+
+
+class _EncodeRequest(object):
+
+    def __init__(self, frames, node_names):
+        self.frames = frames
+        self.node_names = node_names
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        # one connection serves requests until the client closes it
+        while True:
+            try:
+                header, payload = _receive(self.request)
+            except EOFError:
+                return
+
+            try:
+                response, array = self.server.query_server.handle(header, payload)
+            except Exception as e:
+                response, array = {"error": str(e)}, None
+
+            _send(self.request, response, array)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import os
+import ctypes
+import ctypes.util
+import rospy
+import tensorflow as tf
+
+
+class SessionProfile(object):
+    """
+    Threading and graph optimization settings for the TF session.
+
+    Thread counts of 0 let TF pick the number of cores, cpus pins the
+    process to the given cores before the session is created. TF shares its
+    thread pools between sessions of a process, unless per_session_threads
+    is set.
+    """
+
+    OPTIMIZER_LEVELS = {"L0": tf.OptimizerOptions.L0, "L1": tf.OptimizerOptions.L1}
+
+    def __init__(self, intra_op_threads=0, inter_op_threads=0, cpus=[], optimizer_level="L1", per_session_threads=False):
+        if optimizer_level not in self.OPTIMIZER_LEVELS:
+            raise ValueError("SessionProfile - unknown optimizer level " + str(optimizer_level))
+
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.cpus = list(cpus)
+        self.optimizer_level = optimizer_level
+        self.per_session_threads = per_session_threads
+
+    @classmethod
+    def from_params(cls, params):
+        # params is the session section of the yaml config
+        if not params:
+            return cls()
+
+        profile = params.get("profile", "default")
+        profiles = params.get("profiles", {})
+
+        if profile not in profiles:
+            raise KeyError("SessionProfile - profile '%s' not found in config" % profile)
+
+        rospy.loginfo("using session profile " + profile)
+        return cls(**profiles[profile])
+
+    def config(self):
+        optimizer_options = tf.OptimizerOptions(opt_level=self.OPTIMIZER_LEVELS[self.optimizer_level])
+
+        return tf.ConfigProto(intra_op_parallelism_threads=self.intra_op_threads,
+                              inter_op_parallelism_threads=self.inter_op_threads,
+                              use_per_session_threads=self.per_session_threads,
+                              graph_options=tf.GraphOptions(optimizer_options=optimizer_options))
+
+    def pin_cpus(self):
+        # returns whether the process is pinned to cpus
+        if not self.cpus:
+            return False
+
+        if not set_affinity(self.cpus):
+            rospy.logwarn("SessionProfile - cpu pinning is only supported on linux, ignoring cpus")
+            return False
+
+        rospy.loginfo("pinned to cpus " + str(self.cpus))
+        return True
+
+    def create_session(self, graph=None):
+        self.pin_cpus()
+        return tf.Session(graph=graph, config=self.config())
+
+
+def set_affinity(cpus):
+    # python 2 has no os.sched_setaffinity, call it in libc directly
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+        return True
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        sched_setaffinity = libc.sched_setaffinity
+    except (OSError, AttributeError):
+        return False
+
+    # cpu_set_t is a bit mask of 1024 cpus
+    mask = (ctypes.c_ubyte * 128)()
+    for cpu in cpus:
+        mask[cpu // 8] |= 1 << (cpu % 8)
+
+    if sched_setaffinity(0, ctypes.sizeof(mask), ctypes.byref(mask)) != 0:
+        raise OSError(ctypes.get_errno(), "SessionProfile - sched_setaffinity failed for cpus " + str(cpus))
+
+    return True
@@ -15,19 +15,27 @@ class SummaryWriter(object):
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
-            cls._instance = super(SummaryWriter, cls).__new__(cls, *args, **kwargs)
+            cls._instance = super(SummaryWriter, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, summary_folder=None):
+        # the folder is only used by the first instantiation
         if not hasattr(self, 'writer'):
             rospy.logdebug("initializing summary writer.")
+            self.summary_folder = summary_folder
             now = datetime.datetime.now()
             self.directory = self.get_output_folder('summaries') + now.strftime("/%Y-%m-%d-%s")
             self.writer = tf.train.SummaryWriter(self.directory)
 
+            self.image_graph = tf.Graph()
+            self.image_session = tf.Session(graph=self.image_graph)
+            self.image_summary_ops = {}
+
     def get_output_folder(self, path):
         # output_path = pjoin(os.getcwd(), 'output', path)
-        output_path = rospy.get_param("tensorflow_node/publishing/summary_folder")
+        output_path = self.summary_folder
+        if output_path is None:
+            output_path = rospy.get_param("tensorflow_node/publishing/summary_folder")
         if not os.path.exists(output_path):
             os.makedirs(output_path)
         return output_path
@@ -35,49 +43,74 @@ class SummaryWriter(object):
     def get_summary_folder(self):
         return self.directory
 
-    def batch_of_1d_to_image_grid(self, batch):
-        # TODO refactor
-        batch = np.array(batch)
+    @staticmethod
+    def batch_of_1d_to_image_grid(batch, data_shape=None, channels=1, padding=1, out=None):
+        """
+        Tiles a batch of 1d vectors into a single image.
+
+        Every vector is normalized to [0, 1], zero padded to data_shape (square
+        if omitted) and placed in a grid that is filled column by column, with a
+        border of padding pixels around each tile. Vectors of multi-channel data
+        hold the channels interleaved. Passing the result of a previous call as
+        out reuses its buffer.
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        batch_size, length = batch.shape
+
+        if data_shape is None:
+            data_wh = int(np.ceil(np.power(length // channels, 0.5)))
+            data_shape = [data_wh, data_wh]
 
-        data_wh = int(np.ceil(np.power(batch.shape[1], 0.5)))
-        data_shape = [data_wh, data_wh]
+        height, width = data_shape
+        grid_wh = int(np.ceil(np.power(batch_size, 0.5)))
 
-        output_grid_wh = int(np.ceil(np.power(batch.shape[0], 0.5)))
+        if length > height * width * channels:
+            raise ValueError("SummaryWriter - vectors of length %i don't fit into %s" % (length, data_shape))
 
-        output_rows = []
-        outputs = []
+        # normalize all vectors at once, constant vectors become zero
+        minimum = batch.min(axis=1)[:, np.newaxis]
+        extent = batch.max(axis=1)[:, np.newaxis] - minimum
+        extent[extent == 0] = 1.0
 
-        for data in batch:
-            data -= data.min()
-            data *= 1.0 / data.max()
+        # zero padding for short vectors and empty grid cells
+        tiles = np.zeros((grid_wh * grid_wh, height * width * channels), dtype=np.float32)
+        tiles[:batch_size, :length] = (batch - minimum) / extent
 
-            z_pad = np.zeros((data_wh * data_wh) - len(data))
+        tile_height = height + 2 * padding
+        tile_width = width + 2 * padding
+        shape = (grid_wh * tile_height, grid_wh * tile_width, channels)
 
-            if (len(z_pad) > 0):
-                data = np.concatenate(data, z_pad)
+        if out is None or out.size != np.prod(shape):
+            out = np.zeros(shape, dtype=np.float32)
 
-            image = data.reshape(data_shape)
-            image = np.pad(image, pad_width=(1, 1), mode='constant', constant_values=0)
-            outputs.append(image)
+        # view output as [grid row, y, grid column, x, channel] and copy all tiles in one go
+        grid = out.reshape(grid_wh, tile_height, grid_wh, tile_width, channels)
+        tiles = tiles.reshape(grid_wh, grid_wh, height, width, channels)
+        grid[:, padding:padding + height, :, padding:padding + width, :] = tiles.transpose(1, 2, 0, 3, 4)
 
-        while len(outputs) < (output_grid_wh * output_grid_wh):
-            outputs.append(np.zeros([data_shape[0] + 2, data_shape[1] + 2]))
+        if channels == 1:
+            return out.reshape(shape[:2])
 
-        for i in xrange(output_grid_wh):
-            output_rows.append(np.concatenate(outputs[i * output_grid_wh:(i * output_grid_wh) + output_grid_wh], 0))
+        return out.reshape(shape)
 
-        activation_image = np.concatenate(output_rows, 1)
+    def image_summary(self, tag, image, step=0):
+        if image.ndim == 2:
+            image = image[:, :, np.newaxis]
 
-        return activation_image
+        key = (tag, image.shape[2])
 
-    def image_summary(self, tag, image):
-        image = image.reshape((1, image.shape[0], image.shape[1], 1)).astype(np.float32)
+        # ops are built once per tag on a separate graph, so repeated calls
+        # neither grow the network graph nor create new sessions.
+        if key not in self.image_summary_ops:
+            with self.image_graph.as_default():
+                placeholder = tf.placeholder(tf.float32, shape=(1, None, None, image.shape[2]))
+                self.image_summary_ops[key] = (placeholder, tf.image_summary(tag, placeholder))
 
-        image_summary_op = tf.image_summary(tag, image)
-        image_summary_str = tf.Session().run(image_summary_op)
+        placeholder, image_summary_op = self.image_summary_ops[key]
+        image_summary_str = self.image_session.run(image_summary_op, feed_dict={placeholder: image[np.newaxis].astype(np.float32)})
 
-        SummaryWriter().writer.add_summary(image_summary_str, 0)
-        SummaryWriter().writer.flush()
+        self.writer.add_summary(image_summary_str, step)
+        self.writer.flush()
 
         rospy.loginfo("📈 " + tag + " image plotted.")
         pass